@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AdminRegistry:
+    """Admin IDs persisted in a JSON file
+
+    Writes go to a temporary file that is fsynced and renamed over the
+    original, so a crash never leaves a half-written file. The file's
+    mtime is checked at most every check_interval seconds and the set is
+    reloaded when another process changed it.
+    """
+
+    def __init__(self, path='admins.json', initial_admin=None, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._ids = frozenset()
+        self._stat = None
+        self._checked_at = 0
+
+        if not os.path.exists(path):
+            # Create file with initial admin
+            self._ids = self._normalize([initial_admin])
+            self._save()
+        else:
+            self._load()
+
+    @staticmethod
+    def _normalize(ids):
+        """Convert IDs to int, dropping empty values"""
+        result = set()
+        for admin_id in ids:
+            if admin_id is None or str(admin_id).strip() == '':
+                continue
+            try:
+                result.add(int(admin_id))
+            except ValueError:
+                logger.error(f"Ignoring invalid admin ID: {admin_id}")
+        return frozenset(result)
+
+    def _file_stat(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        """Read admin IDs from file"""
+        try:
+            stat = self._file_stat()
+            with open(self.path, 'r') as f:
+                self._ids = self._normalize(json.load(f))
+            self._stat = stat
+            logger.info(f"Loaded {len(self._ids)} admins")
+        except (OSError, ValueError) as e:
+            # Keep the last good set
+            logger.error(f"Error loading admins: {e}")
+
+    def _save(self):
+        """Write admin IDs atomically"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(sorted(self._ids), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # Persist the rename itself
+        directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+        self._stat = self._file_stat()
+
+    def _refresh(self):
+        """Reload if file changed since last check"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                stat = self._file_stat()
+            except OSError:
+                return
+            if stat != self._stat:
+                self._load()
+
+    def __contains__(self, user_id):
+        self._refresh()
+        return user_id in self._ids
+
+    def __iter__(self):
+        self._refresh()
+        return iter(self._ids)
+
+    def __len__(self):
+        self._refresh()
+        return len(self._ids)
+
+    def add(self, admin_id):
+        """Add admin and persist, return False if already an admin"""
+        admin_id = int(admin_id)
+        with self._lock:
+            # Merge with changes made by other processes first
+            if os.path.exists(self.path) and self._file_stat() != self._stat:
+                self._load()
+            if admin_id in self._ids:
+                return False
+            self._ids = self._ids | {admin_id}
+            self._save()
+        logger.info(f"Added admin {admin_id}")
+        return True
@@ -0,0 +1,85 @@
+"""Compare validators module with the previous per-call implementations
+
+    python benchmarks/bench_validators.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import validators
+
+def legacy_validate_email(email):
+    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    return re.match(pattern, email) is not None
+
+def legacy_validate_name(name, lang='en'):
+    if lang == 'zh':
+        return len(name.strip()) >= 2
+    name = ' '.join(name.split())
+    name = name.replace(' ,', ',').replace(', ', ',')
+    parts = [p for p in name.replace(',', ' ').split() if p]
+    if len(parts) < 2:
+        return False
+    allowed_chars = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-'")
+    for part in parts:
+        if len(part) < 2 or not all(c in allowed_chars for c in part):
+            return False
+    return True
+
+def legacy_validate_hash(tx_hash):
+    pattern = r'^0x[0-9a-fA-F]{64}$'
+    return re.match(pattern, tx_hash) is not None
+
+def legacy_validate_wallet(wallet):
+    pattern = r'^0x[0-9a-fA-F]{40}$'
+    return re.match(pattern, wallet) is not None
+
+def legacy_validate_amount(value):
+    try:
+        return float(value) >= 10000
+    except ValueError:
+        return False
+
+ROWS = 10000
+COLUMNS = {
+    'full_name': ["John Smith", "x", "Anna-Maria O'Neil", "Ivan, Petrov"] * (ROWS // 4),
+    'investment_amount': ["15000", "abc", "9000", "250000"] * (ROWS // 4),
+    'email': ["john@example.com", "bad@", "anna@mail.co", "ivan@test.org"] * (ROWS // 4),
+    'tx_hash': ["0x" + "a" * 64, "0x123", "", "0x" + "F" * 64] * (ROWS // 4),
+    'wallet_address': ["0x" + "b" * 40, "", "0xZZ", "0x" + "C" * 40] * (ROWS // 4)
+}
+
+def legacy_batch():
+    for name, amount, email, tx_hash, wallet in zip(*COLUMNS.values()):
+        legacy_validate_name(name)
+        legacy_validate_amount(amount)
+        legacy_validate_email(email)
+        if tx_hash:
+            legacy_validate_hash(tx_hash)
+        if wallet:
+            legacy_validate_wallet(wallet)
+
+def new_batch():
+    validators.validate_columns(COLUMNS)
+
+def bench(label, func, number=5):
+    seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print(f"{label:<28} {seconds * 1000:8.2f} ms  ({ROWS / seconds:,.0f} rows/s)")
+
+if __name__ == '__main__':
+    print(f"{ROWS} rows, 5 columns")
+    bench("legacy per-call functions", legacy_batch)
+    bench("validate_columns", new_batch)
+
+    single = [
+        ("name", lambda: legacy_validate_name("John Smith"), lambda: validators.validate_name("John Smith")),
+        ("email", lambda: legacy_validate_email("john@example.com"), lambda: validators.validate_email("john@example.com")),
+        ("hash", lambda: legacy_validate_hash("0x" + "a" * 64), lambda: validators.validate_hash("0x" + "a" * 64)),
+    ]
+    for label, legacy, new in single:
+        old_us = min(timeit.repeat(legacy, number=20000, repeat=3)) / 20000 * 1e6
+        new_us = min(timeit.repeat(new, number=20000, repeat=3)) / 20000 * 1e6
+        print(f"{label:<6} legacy {old_us:6.2f} us  new {new_us:6.2f} us")
@@ -0,0 +1,374 @@
+"""Offline load test of the whole application funnel
+
+Starts a fake Telegram Bot API server, points the bot at it through
+TELEGRAM_API_URL, replaces the worksheet with an in-memory stand-in and
+walks simulated users through /start, language selection, the
+conversation and admin confirmation. Nothing leaves the machine.
+
+    python benchmarks/load_test.py --users 2000 --concurrency 200
+    python benchmarks/load_test.py --api-latency 0.05 --api-error-rate 0.02 --sheets-error-rate 0.1
+
+Outbound rate limits default to values far above Telegram's, pass
+--global-rate 30 --chat-rate 1 to benchmark with the production limits.
+"""
+import argparse
+import functools
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qsl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TOKEN = '123456:load-test'
+FIRST_ADMIN_ID = 1000
+FIRST_USER_ID = 100000
+
+class FakeTelegram:
+    """Bot API stand-in recording sent messages per chat"""
+
+    def __init__(self, latency=0, error_rate=0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.calls = Counter()
+        self.errors = Counter()
+        self._cond = threading.Condition()
+        self._messages = defaultdict(list)
+        self._message_ids = itertools.count(1)
+        self._server = None
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                path, _, query = self.path.partition('?')
+                params = dict(parse_qsl(query))
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode('utf-8')
+                if 'json' in (self.headers.get('Content-Type') or ''):
+                    params.update(json.loads(body or '{}'))
+                else:
+                    params.update(parse_qsl(body))
+                status, payload = fake.handle(path.rsplit('/', 1)[-1], params)
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    def stop(self):
+        self._server.shutdown()
+
+    def handle(self, method, params):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._cond:
+            self.calls[method] += 1
+            if self.random.random() < self.error_rate:
+                self.errors[method] += 1
+                return 429, {
+                    'ok': False, 'error_code': 429, 'description': 'Too Many Requests: injected',
+                    'parameters': {'retry_after': 0}
+                }
+
+        if method == 'sendMessage':
+            chat_id = int(params['chat_id'])
+            with self._cond:
+                self._messages[chat_id].append(params['text'])
+                self._cond.notify_all()
+            return 200, {'ok': True, 'result': {
+                'message_id': next(self._message_ids),
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'text': params['text']
+            }}
+        if method == 'getChat':
+            chat_id = int(params['chat_id'])
+            return 200, {'ok': True, 'result': {
+                'id': chat_id, 'type': 'private', 'username': f'admin{chat_id}'
+            }}
+        if method == 'getMe':
+            return 200, {'ok': True, 'result': {
+                'id': 1, 'is_bot': True, 'first_name': 'Load test', 'username': 'load_test_bot'
+            }}
+        return 200, {'ok': True, 'result': True}
+
+    def wait_for(self, chat_id, cursor, pattern, timeout):
+        """Wait for message matching pattern after cursor, return (new cursor, text)"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                messages = self._messages[chat_id]
+                for index in range(cursor, len(messages)):
+                    if pattern in messages[index]:
+                        return index + 1, messages[index]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No reply containing {pattern[:30]!r} for chat {chat_id}")
+                self._cond.wait(remaining)
+
+    def cursor(self, chat_id):
+        with self._cond:
+            return len(self._messages[chat_id])
+
+
+class FakeSheet:
+    """In-memory worksheet with the gspread methods ExcelService uses"""
+
+    def __init__(self, latency=0, error_rate=0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.rows = []
+        self.calls = Counter()
+        self.errors = Counter()
+        self._lock = threading.Lock()
+
+    def _call(self, method):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls[method] += 1
+            if self.random.random() < self.error_rate:
+                self.errors[method] += 1
+                raise RuntimeError(f"Injected Sheets error in {method}")
+
+    def row_values(self, row):
+        self._call('row_values')
+        with self._lock:
+            return list(self.rows[row - 1]) if row <= len(self.rows) else []
+
+    def insert_row(self, values, index=1):
+        self._call('insert_row')
+        with self._lock:
+            self.rows.insert(index - 1, list(values))
+
+    def batch_get(self, ranges):
+        self._call('batch_get')
+        result = []
+        with self._lock:
+            for cell_range in ranges:
+                match = re.match(r'A(\d+)(?::A(\d+))?$', cell_range)
+                start = int(match.group(1))
+                end = int(match.group(2) or start)
+                values = [[row[0]] if row and row[0] else [] for row in self.rows[start - 1:end]]
+                while values and not values[-1]:
+                    values.pop()
+                result.append(values)
+        return result
+
+    def append_rows(self, rows):
+        self._call('append_rows')
+        with self._lock:
+            start = len(self.rows) + 1
+            self.rows.extend([str(value) for value in row] for row in rows)
+            return {'updates': {'updatedRange': f'Sheet1!A{start}:H{len(self.rows)}'}}
+
+    def batch_update(self, data):
+        self._call('batch_update')
+        with self._lock:
+            for update in data:
+                column = 'ABCDEFGH'.index(update['range'][0])
+                row = self.rows[int(update['range'][1:]) - 1]
+                row.extend([''] * (column + 1 - len(row)))
+                row[column] = update['values'][0][0]
+
+
+class LoadTest:
+    """Drive simulated users through the bot"""
+
+    def __init__(self, main, telegram, admins, timeout):
+        self.main = main
+        self.telegram = telegram
+        self.timeout = timeout
+        self.admin_ids = list(admins)
+        # One confirmation at a time per admin chat, its state is a single slot
+        self.admin_locks = {admin_id: threading.Lock() for admin_id in self.admin_ids}
+        self.messages = main.MESSAGES['en']
+        self.update_ids = itertools.count(1)
+        self.latencies = defaultdict(list)
+        self.failures = Counter()
+        self._lock = threading.Lock()
+
+    def send(self, user_id, text):
+        from telebot import types
+        update_id = next(self.update_ids)
+        update = types.Update.de_json({
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id,
+                'date': int(time.time()),
+                'chat': {'id': user_id, 'type': 'private'},
+                'from': {'id': user_id, 'is_bot': False, 'first_name': 'Load'},
+                'text': text
+            }
+        })
+        self.main.bot.process_new_updates([update])
+
+    def step(self, name, user_id, text, expected):
+        """Send text and wait for reply containing expected, return reply"""
+        cursor = self.telegram.cursor(user_id)
+        start = time.perf_counter()
+        self.send(user_id, text)
+        _, reply = self.telegram.wait_for(user_id, cursor, expected, self.timeout)
+        with self._lock:
+            self.latencies[name].append(time.perf_counter() - start)
+        return reply
+
+    def confirm(self, investment_id, user_id):
+        """Confirm application as one of the admins"""
+        admin_id = self.admin_ids[user_id % len(self.admin_ids)]
+        with self.admin_locks[admin_id]:
+            cursor = self.telegram.cursor(user_id)
+            start = time.perf_counter()
+            self.step('admin_confirm_button', admin_id, self.main.keyboards.ADMIN_CONFIRM_BUTTON, 'ID')
+            self.step('admin_confirmation', admin_id, investment_id, investment_id)
+        self.telegram.wait_for(user_id, cursor, self.messages['documents_sent'], self.timeout)
+        with self._lock:
+            self.latencies['user_notified'].append(time.perf_counter() - start)
+
+    def run_user(self, index):
+        user_id = FIRST_USER_ID + index
+        messages = self.messages
+        try:
+            self.step('start', user_id, '/start', 'Welcome')
+            self.step('language', user_id, self.main.MESSAGES.labels['en'], messages['pitch_deck'])
+            self.step('reviewing_pitch', user_id, messages['reviewed_button'], messages['enter_name'])
+            self.step('entering_name', user_id, f'Load User{index}', messages['enter_amount'])
+            self.step('entering_amount', user_id, '15000', messages['enter_email'])
+            self.step('entering_email', user_id, f'user{index}@example.com', messages['wait_for_confirmation'])
+
+            investment_id = self.main.sessions.get(user_id)['investment_id']
+            self.confirm(investment_id, user_id)
+
+            self.step('document_sent', user_id, messages['document_signed_button'], messages['enter_hash'])
+            self.step('entering_hash', user_id, '0x' + f'{index:064x}', messages['enter_wallet'])
+            self.step('entering_wallet', user_id, '0x' + f'{index:040x}', messages['success'])
+            return True
+        except Exception as e:
+            with self._lock:
+                self.failures[type(e).__name__] += 1
+            return False
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline load test of the bot funnel")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=100, help="Users walking the funnel at once")
+    parser.add_argument('--admins', type=int, default=4)
+    parser.add_argument('--api-latency', type=float, default=0.0, help="Seconds per Bot API call")
+    parser.add_argument('--api-error-rate', type=float, default=0.0, help="Share of Bot API calls failing with 429")
+    parser.add_argument('--sheets-latency', type=float, default=0.0, help="Seconds per Sheets call")
+    parser.add_argument('--sheets-error-rate', type=float, default=0.0, help="Share of Sheets calls raising")
+    parser.add_argument('--global-rate', type=float, default=10000, help="Outbound messages per second")
+    parser.add_argument('--chat-rate', type=float, default=1000, help="Outbound messages per second per chat")
+    parser.add_argument('--outbox-workers', type=int, default=4, help="Threads sending messages")
+    parser.add_argument('--update-workers', type=int, default=8, help="Threads handling updates")
+    parser.add_argument('--timeout', type=float, default=60, help="Seconds to wait for each reply")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    telegram = FakeTelegram(args.api_latency, args.api_error_rate, args.seed)
+    sheet = FakeSheet(args.sheets_latency, args.sheets_error_rate, args.seed)
+    admin_ids = [FIRST_ADMIN_ID + i for i in range(args.admins)]
+
+    # Runtime files of the bot go to a scratch directory
+    workdir = tempfile.mkdtemp(prefix='bot-load-test-')
+    os.chdir(workdir)
+    with open('admins.json', 'w') as f:
+        json.dump(admin_ids, f)
+    os.environ.update({
+        'TELEGRAM_BOT_TOKEN': TOKEN,
+        'TELEGRAM_API_URL': telegram.start(),
+        'SQLITE_PATH': os.path.join(workdir, 'bot.db'),
+        'SHEETS_MIRROR': '1',
+        'METRICS': '1',
+        'OUTBOX_GLOBAL_RATE': str(args.global_rate),
+        'OUTBOX_CHAT_RATE': str(args.chat_rate),
+        'OUTBOX_WORKERS': str(args.outbox_workers),
+        'UPDATE_WORKERS': str(args.update_workers),
+    })
+    os.environ.pop('COORDINATION', None)
+
+    import logging
+    import excel_service
+    excel_service.ExcelService = functools.partial(
+        excel_service.ExcelService, index_path=os.path.join(workdir, 'sheet_index.db'), sheet=sheet
+    )
+    import main as bot_main
+    logging.getLogger().setLevel(logging.WARNING)
+
+    test = LoadTest(bot_main, telegram, admin_ids, args.timeout)
+    print(f"Simulating {args.users} users, {args.concurrency} at a time, data in {workdir}")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        completed = sum(executor.map(test.run_user, range(args.users)))
+    elapsed = time.perf_counter() - start
+
+    # Wait for the sheet to catch up
+    flush_start = time.perf_counter()
+    while bot_main.write_queue.pending_count() and time.perf_counter() - flush_start < args.timeout:
+        time.sleep(0.1)
+    flush_time = time.perf_counter() - flush_start
+
+    steps = sum(len(values) for values in test.latencies.values())
+    print(f"\nCompleted {completed}/{args.users} users in {elapsed:.1f}s")
+    print(f"Throughput: {completed / elapsed:.1f} users/s, {steps / elapsed:.1f} steps/s")
+    if test.failures:
+        print(f"Failures: {dict(test.failures)}")
+
+    print(f"\n{'step':<24}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    all_latencies = []
+    for name, values in test.latencies.items():
+        all_latencies.extend(values)
+        print(f"{name:<24}{len(values):>8}{percentile(values, 0.5) * 1000:>10.1f}{percentile(values, 0.99) * 1000:>10.1f}")
+    print(f"{'all':<24}{len(all_latencies):>8}"
+          f"{percentile(all_latencies, 0.5) * 1000:>10.1f}{percentile(all_latencies, 0.99) * 1000:>10.1f}")
+
+    print(f"\nBot API calls: {dict(telegram.calls)}, injected errors: {dict(telegram.errors)}")
+    print(f"Sheets calls: {dict(sheet.calls)}, injected errors: {dict(sheet.errors)}")
+    print(f"Sheet rows: {len(sheet.rows) - 1}, write queue drained in {flush_time:.1f}s, "
+          f"{bot_main.write_queue.pending_count()} still pending")
+
+    bot_main.bot.update_pool.stop()
+    bot_main.admin_profiles.stop()
+    bot_main.outbox.stop()
+    bot_main.write_queue.stop()
+    bot_main.sheets.stop()
+    telegram.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+from outbox import PRIORITY_BROADCAST
+
+class Broadcaster:
+    """Send a message to many chats through the outbound dispatcher
+
+    Sends run concurrently and are throttled, retried and ordered by the
+    dispatcher.
+    """
+
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+
+    def broadcast(self, chat_ids, text, priority=PRIORITY_BROADCAST, **kwargs):
+        """Queue text for every chat, return dict mapping chat ID to Future of delivery status
+
+        Status is a dict with 'ok', 'attempts', 'error' and 'message_id' keys.
+        """
+        return {
+            chat_id: self.dispatcher.send_message(chat_id, text, priority=priority, **kwargs)
+            for chat_id in chat_ids
+        }
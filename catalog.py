@@ -0,0 +1,173 @@
+"""Compiled translation catalogs
+
+Sources live in locales/src: languages.yaml lists language codes and
+keyboard labels, <code>.yaml maps message keys to text. Build with
+
+    python catalog.py
+
+which writes locales/index.bin (languages and interned key table) and one
+locales/<code>.cat per language. Catalogs are loaded on first use of a
+language.
+"""
+import os
+import struct
+import sys
+import threading
+import zlib
+import logging
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locales')
+SOURCE_DIR = os.path.join(CATALOG_DIR, 'src')
+
+INDEX_MAGIC = b'BIDX'
+CATALOG_MAGIC = b'BCAT'
+VERSION = 1
+
+# magic, version, count, key table checksum
+HEADER = struct.Struct('<4sHII')
+
+def _pack_strings(strings):
+    """Pack strings as offset table followed by UTF-8 blob"""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    return struct.pack(f'<{len(offsets)}I', *offsets) + b''.join(encoded)
+
+def _unpack_strings(data, count, start):
+    """Read strings packed by _pack_strings"""
+    offsets = struct.unpack_from(f'<{count + 1}I', data, start)
+    blob = start + 4 * (count + 1)
+    return [data[blob + offsets[i]:blob + offsets[i + 1]].decode('utf-8') for i in range(count)]
+
+def _write_atomic(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def build(source_dir=SOURCE_DIR, output_dir=CATALOG_DIR):
+    """Compile YAML sources into binary catalogs"""
+    import yaml
+
+    with open(os.path.join(source_dir, 'languages.yaml'), encoding='utf-8') as f:
+        languages = yaml.safe_load(f)
+
+    sources = {}
+    for language in languages:
+        with open(os.path.join(source_dir, f"{language['code']}.yaml"), encoding='utf-8') as f:
+            sources[language['code']] = yaml.safe_load(f)
+
+    # Key table follows the order of the first language
+    keys = list(sources[languages[0]['code']])
+    missing = [
+        f"{key}/{code}"
+        for code, messages in sources.items()
+        for key in keys
+        if not messages.get(key)
+    ]
+    extra = [
+        f"{key}/{code}"
+        for code, messages in sources.items()
+        for key in messages
+        if key not in keys
+    ]
+    if missing or extra:
+        raise ValueError(f"Incomplete catalogs, missing: {missing}, unknown: {extra}")
+
+    key_table = _pack_strings(keys)
+    checksum = zlib.crc32(key_table)
+
+    codes = [language['code'] for language in languages]
+    labels = [language['label'] for language in languages]
+    index = (
+        HEADER.pack(INDEX_MAGIC, VERSION, len(keys), checksum)
+        + struct.pack('<I', len(codes))
+        + _pack_strings(codes + labels)
+        + key_table
+    )
+    os.makedirs(output_dir, exist_ok=True)
+    _write_atomic(os.path.join(output_dir, 'index.bin'), index)
+
+    for code, messages in sources.items():
+        data = HEADER.pack(CATALOG_MAGIC, VERSION, len(keys), checksum) + _pack_strings(
+            [messages[key] for key in keys]
+        )
+        _write_atomic(os.path.join(output_dir, f'{code}.cat'), data)
+
+    logger.info(f"Compiled {len(keys)} messages for {len(codes)} languages")
+    return codes
+
+
+class Catalog:
+    """Lazily loaded translation catalogs
+
+    catalog[lang][key] returns message text. Only the index is read on
+    creation, each language file is read on its first access.
+    """
+
+    def __init__(self, directory=CATALOG_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._languages = {}
+
+        with open(os.path.join(directory, 'index.bin'), 'rb') as f:
+            data = f.read()
+        magic, version, key_count, self._checksum = HEADER.unpack_from(data)
+        if magic != INDEX_MAGIC or version != VERSION:
+            raise ValueError("Unsupported catalog index")
+        (language_count,) = struct.unpack_from('<I', data, HEADER.size)
+        start = HEADER.size + 4
+        names = _unpack_strings(data, language_count * 2, start)
+        self.codes = tuple(names[:language_count])
+        self.labels = MappingProxyType(dict(zip(self.codes, names[language_count:])))
+
+        start += 4 * (language_count * 2 + 1) + sum(len(n.encode('utf-8')) for n in names)
+        # Interned keys, shared by all languages
+        self.keys = tuple(sys.intern(key) for key in _unpack_strings(data, key_count, start))
+
+    def check(self):
+        """Verify every language catalog matches the key table without loading it"""
+        for code in self.codes:
+            with open(os.path.join(self.directory, f'{code}.cat'), 'rb') as f:
+                magic, version, count, checksum = HEADER.unpack(f.read(HEADER.size))
+            if magic != CATALOG_MAGIC or version != VERSION:
+                raise ValueError(f"Unsupported catalog for {code}")
+            if count != len(self.keys) or checksum != self._checksum:
+                raise ValueError(f"Catalog for {code} is out of date, run python catalog.py")
+
+    def _load(self, code):
+        """Read one language catalog"""
+        with open(os.path.join(self.directory, f'{code}.cat'), 'rb') as f:
+            data = f.read()
+        magic, version, count, checksum = HEADER.unpack_from(data)
+        if magic != CATALOG_MAGIC or count != len(self.keys) or checksum != self._checksum:
+            raise ValueError(f"Catalog for {code} is out of date, run python catalog.py")
+        texts = _unpack_strings(data, count, HEADER.size)
+        logger.info(f"Loaded {code} catalog")
+        return MappingProxyType(dict(zip(self.keys, texts)))
+
+    def __getitem__(self, code):
+        messages = self._languages.get(code)
+        if messages is None:
+            if code not in self.labels:
+                raise KeyError(code)
+            with self._lock:
+                messages = self._languages.get(code)
+                if messages is None:
+                    messages = self._languages[code] = self._load(code)
+        return messages
+
+    def __contains__(self, code):
+        return code in self.labels
+
+    def __iter__(self):
+        return iter(self.codes)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    build()
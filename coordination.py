@@ -0,0 +1,275 @@
+import json
+import os
+from contextlib import contextmanager
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+def instance_name():
+    """Unique name of this bot process"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+class CoordinationBackend:
+    """Shared state between bot processes
+
+    Values are JSON-serializable. Leases are keys owned by one process
+    until they expire or are released. Sessions and applications are in
+    the local SQLite database, so processes sharing state must run on one
+    host.
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def acquire(self, key, owner, ttl):
+        """Take lease or renew it if owner already holds it, return True on success"""
+        raise NotImplementedError
+
+    def release(self, key, owner):
+        """Give up lease if owner holds it"""
+        raise NotImplementedError
+
+
+class SQLiteCoordination(CoordinationBackend):
+    """Coordination through a SQLite file shared by processes on one host
+
+    Expired leases, locks and values are deleted every purge_interval
+    seconds.
+    """
+
+    def __init__(self, path='bot.db', purge_interval=600):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS coordination (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS coordination_expires_at ON coordination (expires_at)"
+        )
+
+        self._stop_event = threading.Event()
+        self._purger = threading.Thread(
+            target=self._run_purge, args=(purge_interval,), name='coordination-purge', daemon=True
+        )
+        self._purger.start()
+
+    def get(self, key):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM coordination WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO coordination (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+
+    def delete(self, key):
+        with self._lock:
+            self.conn.execute("DELETE FROM coordination WHERE key = ?", (key,))
+
+    def acquire(self, key, owner, ttl):
+        now = time.time()
+        with self._lock:
+            # Write lock for the whole check-and-set
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT value, expires_at FROM coordination WHERE key = ?", (key,)
+                ).fetchone()
+                if row and json.loads(row[0]) != owner and row[1] is not None and row[1] > now:
+                    self.conn.execute("COMMIT")
+                    return False
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO coordination (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(owner), now + ttl)
+                )
+                self.conn.execute("COMMIT")
+                return True
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def release(self, key, owner):
+        with self._lock:
+            self.conn.execute(
+                "DELETE FROM coordination WHERE key = ? AND value = ?", (key, json.dumps(owner))
+            )
+
+    def purge_expired(self):
+        """Delete expired keys, return number of deleted keys"""
+        with self._lock:
+            cursor = self.conn.execute(
+                "DELETE FROM coordination WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+        if cursor.rowcount:
+            logger.info(f"Purged {cursor.rowcount} expired coordination keys")
+        return cursor.rowcount
+
+    def _run_purge(self, interval):
+        """Periodically purge expired keys"""
+        while not self._stop_event.wait(interval):
+            try:
+                self.purge_expired()
+            except Exception as e:
+                logger.error(f"Error purging coordination keys: {e}")
+
+    def close(self):
+        """Stop purging and close database connection"""
+        self._stop_event.set()
+        with self._lock:
+            self.conn.close()
+
+
+class Lease:
+    """Lease kept alive by a background thread"""
+
+    def __init__(self, backend, key, owner, ttl=15, on_acquired=None, on_lost=None):
+        self.backend = backend
+        self.key = key
+        self.owner = owner
+        self.ttl = ttl
+        self.on_acquired = on_acquired
+        self.on_lost = on_lost
+        self.held = False
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def try_acquire(self):
+        """Acquire or renew lease once"""
+        try:
+            held = self.backend.acquire(self.key, self.owner, self.ttl)
+        except Exception as e:
+            logger.error(f"Error renewing lease {self.key}: {e}")
+            held = False
+        if held and not self.held:
+            self.held = True
+            logger.info(f"Acquired lease {self.key}")
+            if self.on_acquired:
+                self.on_acquired()
+        elif not held and self.held:
+            self.held = False
+            logger.warning(f"Lost lease {self.key}")
+            if self.on_lost:
+                self.on_lost()
+        return held
+
+    def start(self):
+        """Keep trying to acquire and renew lease in background"""
+        self._thread = threading.Thread(target=self._run, name=f'lease-{self.key}', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            self.try_acquire()
+            if self._stop_event.wait(self.ttl / 3):
+                return
+
+    def stop(self):
+        """Stop renewing and release lease"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(self.ttl)
+        if self.held:
+            self.held = False
+            try:
+                self.backend.release(self.key, self.owner)
+            except Exception as e:
+                logger.error(f"Error releasing lease {self.key}: {e}")
+
+
+def allocate_node_id(backend, owner, max_nodes, ttl=60, on_acquired=None, on_lost=None):
+    """Lease a free node ID, return (node_id, Lease)
+
+    on_lost is called when the lease could not be renewed and another
+    process may take the node ID, on_acquired when it is renewed again.
+    """
+    for node_id in range(max_nodes):
+        lease = Lease(backend, f'node:{node_id}', owner, ttl)
+        if lease.try_acquire():
+            logger.info(f"Using node ID {node_id}")
+            lease.on_acquired = on_acquired
+            lease.on_lost = on_lost
+            return node_id, lease.start()
+    raise RuntimeError(f"All {max_nodes} node IDs are taken")
+
+
+class KeyLock:
+    """Mutual exclusion per key between processes, built on leases
+
+    A lock held by a process that died is freed when its lease expires
+    after ttl seconds.
+    """
+
+    def __init__(self, backend, prefix, owner, ttl=60, timeout=60, poll_interval=0.05):
+        self.backend = backend
+        self.prefix = prefix
+        self.owner = owner
+        self.ttl = ttl
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    @contextmanager
+    def hold(self, key):
+        """Wait until lock of key is free and hold it in the with block"""
+        name = f'{self.prefix}{key}'
+        deadline = time.monotonic() + self.timeout
+        while not self.backend.acquire(name, self.owner, self.ttl):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Lock {name} is still held by another process")
+            time.sleep(self.poll_interval)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            if time.monotonic() - start > self.ttl:
+                logger.warning(f"Lock {name} was held longer than its {self.ttl}s lease")
+            self.backend.release(name, self.owner)
+
+
+class SharedMap:
+    """Dict-like view over coordination backend keys"""
+
+    def __init__(self, backend, prefix, ttl=None):
+        self.backend = backend
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        value = self.backend.get(f'{self.prefix}{key}')
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if value is None:
+            self.backend.delete(f'{self.prefix}{key}')
+        else:
+            self.backend.set(f'{self.prefix}{key}', value, self.ttl)
@@ -0,0 +1,70 @@
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ProcessedUpdates:
+    """Bounded persistent record of handled Telegram update IDs
+
+    Claiming an update is one upsert, so processes sharing the database
+    file never both handle it. Entries older than max_age are forgotten
+    because Telegram picks update IDs at random after a week without
+    updates, and at most capacity entries are kept.
+    """
+
+    def __init__(self, path='bot.db', capacity=100000, max_age=24 * 3600, trim_interval=1000):
+        self.capacity = capacity
+        self.max_age = max_age
+        self.trim_interval = trim_interval
+        self._claims = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS processed_updates (
+                    update_id INTEGER PRIMARY KEY,
+                    processed_at REAL NOT NULL
+                )
+            """)
+
+    def claim(self, update_ids):
+        """Record update IDs, return set of those not seen before"""
+        now = time.time()
+        claimed = set()
+        with self._lock, self.conn:
+            for update_id in update_ids:
+                # Conflicting row is only replaced if it expired
+                cursor = self.conn.execute("""
+                    INSERT INTO processed_updates (update_id, processed_at) VALUES (?, ?)
+                    ON CONFLICT (update_id) DO UPDATE SET processed_at = excluded.processed_at
+                    WHERE processed_at < ?
+                """, (update_id, now, now - self.max_age))
+                if cursor.rowcount:
+                    claimed.add(update_id)
+            self._claims += len(claimed)
+            if self._claims >= self.trim_interval:
+                self._claims = 0
+                self._trim(now)
+        return claimed
+
+    def release(self, update_id):
+        """Forget update ID so it can be claimed again"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM processed_updates WHERE update_id = ?", (update_id,))
+
+    def _trim(self, now):
+        """Drop expired entries and keep at most capacity"""
+        self.conn.execute("DELETE FROM processed_updates WHERE processed_at < ?", (now - self.max_age,))
+        self.conn.execute("""
+            DELETE FROM processed_updates WHERE update_id NOT IN (
+                SELECT update_id FROM processed_updates ORDER BY processed_at DESC LIMIT ?
+            )
+        """, (self.capacity,))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
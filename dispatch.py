@@ -0,0 +1,145 @@
+import queue
+import sqlite3
+import threading
+import time
+import logging
+import requests
+import telebot
+
+logger = logging.getLogger(__name__)
+
+# Handler errors after which a redelivered update is handled again
+TRANSIENT_ERRORS = (sqlite3.OperationalError, requests.exceptions.RequestException)
+
+def update_chat_id(update):
+    """Get chat ID an update belongs to"""
+    if update.message:
+        return update.message.chat.id
+    if update.edited_message:
+        return update.edited_message.chat.id
+    if update.callback_query and update.callback_query.message:
+        return update.callback_query.message.chat.id
+    return None
+
+class ChatWorkerPool:
+    """Process updates on worker threads sharded by chat ID
+
+    All updates of one chat go to the same shard, so they are handled
+    strictly in order, while other shards keep running if one is stuck.
+    """
+
+    def __init__(self, handler, size=8):
+        self.handler = handler
+        self.size = size
+        self._queues = [queue.Queue() for _ in range(size)]
+        # Per shard: seconds the last update waited in queue, start of current update
+        self._lag = [0.0] * size
+        self._busy_since = [None] * size
+        self._processed = [0] * size
+        self._threads = []
+        for shard in range(size):
+            thread = threading.Thread(target=self._run, args=(shard,), name=f'chat-worker-{shard}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started {size} chat workers")
+
+    def submit(self, update):
+        """Queue update on the shard of its chat"""
+        chat_id = update_chat_id(update)
+        key = chat_id if chat_id is not None else update.update_id
+        self._queues[key % self.size].put((time.monotonic(), update))
+
+    def _run(self, shard):
+        """Handle updates of one shard"""
+        updates = self._queues[shard]
+        while True:
+            item = updates.get()
+            if item is None:
+                return
+            enqueued_at, update = item
+            now = time.monotonic()
+            self._lag[shard] = now - enqueued_at
+            self._busy_since[shard] = now
+            try:
+                self.handler(update)
+            except Exception as e:
+                logger.error(f"Error handling update {update.update_id}: {e}")
+            finally:
+                self._busy_since[shard] = None
+                self._processed[shard] += 1
+
+    def queue_depth(self):
+        """Total number of updates waiting in all shards"""
+        return sum(q.qsize() for q in self._queues)
+
+    def stats(self):
+        """Per shard queue depth, lag and processed count"""
+        now = time.monotonic()
+        result = []
+        for shard in range(self.size):
+            busy_since = self._busy_since[shard]
+            result.append({
+                'shard': shard,
+                'depth': self._queues[shard].qsize(),
+                'lag': self._lag[shard],
+                'busy_for': now - busy_since if busy_since is not None else 0.0,
+                'processed': self._processed[shard]
+            })
+        return result
+
+    def stop(self, timeout=10):
+        """Finish queued updates and stop workers"""
+        for q in self._queues:
+            q.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+class PooledTeleBot(telebot.TeleBot):
+    """TeleBot that dispatches updates to a per-chat worker pool
+
+    The pool orders updates of a chat within this process. With several
+    processes, chat_locks is a coordination.KeyLock held while a chat's
+    update is handled, so no two processes handle one chat at once.
+    Updates are claimed in processed_updates under that lock, right
+    before their handlers run.
+    """
+
+    def __init__(self, token, pool_size=8, processed_updates=None, chat_locks=None, **kwargs):
+        kwargs['threaded'] = False
+        super().__init__(token, **kwargs)
+        self.update_pool = ChatWorkerPool(self._process_update, pool_size)
+        # ProcessedUpdates filtering out redelivered updates
+        self.processed_updates = processed_updates
+        self.chat_locks = chat_locks
+
+    def process_new_updates(self, updates):
+        """Queue updates instead of handling them in the polling thread"""
+        for update in updates:
+            # Advance offset right away so polling does not fetch them again
+            if update.update_id > self.last_update_id:
+                self.last_update_id = update.update_id
+        for update in updates:
+            self.update_pool.submit(update)
+
+    def _process_update(self, update):
+        """Run handlers for a single update"""
+        chat_id = update_chat_id(update)
+        if self.chat_locks is None or chat_id is None:
+            self._handle_once(update)
+            return
+        with self.chat_locks.hold(chat_id):
+            self._handle_once(update)
+
+    def _handle_once(self, update):
+        """Run handlers unless the update was already claimed"""
+        if self.processed_updates is not None and not self.processed_updates.claim([update.update_id]):
+            logger.info(f"Skipping already processed update {update.update_id}")
+            return
+        try:
+            super().process_new_updates([update])
+        except TRANSIENT_ERRORS:
+            if self.processed_updates is not None:
+                # Let a redelivery of the update run again
+                self.processed_updates.release(update.update_id)
+            raise
@@ -1,8 +1,10 @@
 import datetime
-import uuid
 import logging
 from google.oauth2.service_account import Credentials
 import gspread
+import metrics
+from storage import StorageBackend
+from sheet_sync import SheetIndex, SheetSync
 
 # Configure logging
 logging.basicConfig(
@@ -12,22 +14,42 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class ExcelService:
-    def __init__(self):
-        # Initialize Google Sheets credentials
-        scope = ['https://spreadsheets.google.com/feeds',
-                'https://www.googleapis.com/auth/drive']
-        
-        credentials = Credentials.from_service_account_file(
-            'key_google_drive.json', 
-            scopes=scope
-        )
-        
-        gc = gspread.authorize(credentials)
-        self.sheet = gc.open_by_key('16Y8kKLPpd-K1xNWHP9Hu3z07IVnZmXF4K4OSUbt87gA').sheet1
+class ExcelService(StorageBackend):
+    """Google Sheets storage backend"""
+
+    # Record keys in sheet column order
+    FIELDS = [
+        'investment_id',
+        'created_at',
+        'telegram_id',
+        'full_name',
+        'investment_amount',
+        'email',
+        'tx_hash',
+        'wallet_address'
+    ]
+
+    SHEET_KEY = '16Y8kKLPpd-K1xNWHP9Hu3z07IVnZmXF4K4OSUbt87gA'
+
+    def __init__(self, index_path='sheet_index.db', block_size=500, sheet=None):
+        if sheet is None:
+            # Initialize Google Sheets credentials
+            scope = ['https://spreadsheets.google.com/feeds',
+                    'https://www.googleapis.com/auth/drive']
+
+            credentials = Credentials.from_service_account_file(
+                'key_google_drive.json',
+                scopes=scope
+            )
+
+            gc = gspread.authorize(credentials)
+            sheet = gc.open_by_key(self.SHEET_KEY).sheet1
+        # Worksheet or anything with the same methods, e.g. a stand-in for benchmarks
+        self.sheet = sheet
         
-        # Store used IDs
-        self.used_ids = set()
+        # Persistent row index
+        self.index = SheetIndex(index_path, self.SHEET_KEY, block_size)
+        self.sync = SheetSync(self.sheet, self.index)
         self._load_existing_ids()
         
         # Check and create headers if needed
@@ -35,15 +57,29 @@ class ExcelService:
         logger.info("Excel service initialized successfully")
 
     def _load_existing_ids(self):
-        """Load existing IDs from sheet"""
+        """Pick up rows added to the sheet since the index was last synced"""
         try:
-            # Get all IDs from first column (excluding header)
-            ids = self.sheet.col_values(1)[1:]
-            self.used_ids.update(ids)
-            logger.info(f"Loaded {len(self.used_ids)} existing IDs")
+            self.sync.refresh()
+            logger.info(f"Loaded {len(self.index)} existing IDs")
         except Exception as e:
             logger.error(f"Error loading existing IDs: {e}")
 
+    def resync_index(self, expected=None, full=False):
+        """Update row index after manual edits in the sheet
+
+        expected maps investment IDs to rows about to be written, see
+        SheetSync.refresh. full verifies every block.
+        """
+        try:
+            if full:
+                self.sync.rescan()
+            else:
+                self.sync.refresh(expected)
+            return True
+        except Exception as e:
+            logger.error(f"Error resyncing row index: {e}")
+            return False
+
     def _ensure_headers(self):
         """Ensure sheet has proper headers"""
         headers = [
@@ -67,62 +103,114 @@ class ExcelService:
         except Exception as e:
             logger.error(f"Error checking/creating headers: {e}")
 
-    def get_next_id(self):
-        """Generate unique ID"""
-        while True:
-            # Generate ID using timestamp and random component
-            timestamp = datetime.datetime.now().strftime('%H%M')
-            random_part = str(uuid.uuid4())[:4].upper()
-            new_id = f"{timestamp}{random_part}"
-            
-            # Check if ID is unique
-            if new_id not in self.used_ids:
-                self.used_ids.add(new_id)
-                logger.info(f"Generated new unique ID: {new_id}")
-                return new_id
-
     def _find_row_by_investment_id(self, investment_id):
-        """Find row number by investment ID"""
-        try:
-            column_values = self.sheet.col_values(1)  # Get all values in first column
-            for idx, value in enumerate(column_values, start=1):
-                if value == investment_id:
-                    return idx
-            return None
-        except Exception as e:
-            logger.error(f"Error finding row: {e}")
-            return None
+        """Find row number by investment ID in the local index"""
+        return self.index.find(investment_id)
 
-    def save_user_data(self, investment_id, telegram_id, full_name, investment_amount, email, tx_hash="", wallet_address=""):
-        """Save or update user data in Google Sheets"""
-        try:
-            row_data = [
-                investment_id,
-                datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                telegram_id,
-                full_name,
-                investment_amount,
-                email,
-                tx_hash,
-                wallet_address
-            ]
-            
-            # Check if row with this investment_id already exists
+    @metrics.timed(metrics.EXTERNAL_CALL_SECONDS, 'sheets.save_batch')
+    def save_batch(self, records):
+        """Save records with one append_rows and one batch_update call
+
+        Returns dict mapping investment ID to success flag.
+        """
+        results = {record['investment_id']: False for record in records}
+
+        # Check rows about to be updated still hold their IDs
+        expected = {}
+        for record in records:
+            row = self._find_row_by_investment_id(record['investment_id'])
+            if row is not None and (record.get('tx_hash') or record.get('wallet_address')):
+                expected[record['investment_id']] = row
+        # Index is current afterwards, records still without a row are appended whole
+        if not self.resync_index(expected):
+            return results
+
+        now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        new_rows = []
+        new_ids = []
+        cell_updates = []
+        update_ids = []
+        for record in records:
+            investment_id = record['investment_id']
             existing_row = self._find_row_by_investment_id(investment_id)
-            
+            tx_hash = record.get('tx_hash', '')
+            wallet_address = record.get('wallet_address', '')
+
             if existing_row and (tx_hash or wallet_address):
                 # Update only transaction hash and wallet address in existing row
                 if tx_hash:
-                    self.sheet.update_cell(existing_row, 7, tx_hash)
+                    cell_updates.append({'range': f'G{existing_row}', 'values': [[tx_hash]]})
                 if wallet_address:
-                    self.sheet.update_cell(existing_row, 8, wallet_address)
-                logger.info(f"Updated existing row for investment ID: {investment_id}")
+                    cell_updates.append({'range': f'H{existing_row}', 'values': [[wallet_address]]})
+                update_ids.append(investment_id)
+            elif existing_row:
+                # Replayed write, row is already there
+                logger.info(f"Row already exists for investment ID: {investment_id}")
+                results[investment_id] = True
             else:
-                # Add new row if it doesn't exist
-                self.sheet.append_row(row_data)
-                logger.info(f"Added new row for investment ID: {investment_id}")
-            
-            return True
+                new_rows.append([
+                    investment_id,
+                    now,
+                    record['telegram_id'],
+                    record['full_name'],
+                    record['investment_amount'],
+                    record['email'],
+                    tx_hash,
+                    wallet_address
+                ])
+                new_ids.append(investment_id)
+
+        if new_rows:
+            try:
+                response = self.sheet.append_rows(new_rows)
+                first_row = self._appended_first_row(response)
+                self.index.add_rows({
+                    investment_id: first_row + offset
+                    for offset, investment_id in enumerate(new_ids)
+                })
+                for investment_id in new_ids:
+                    results[investment_id] = True
+                logger.info(f"Added {len(new_rows)} new rows")
+            except Exception as e:
+                logger.error(f"Error appending rows to sheet: {e}")
+
+        if cell_updates:
+            try:
+                self.sheet.batch_update(cell_updates)
+                for investment_id in update_ids:
+                    results[investment_id] = True
+                logger.info(f"Updated {len(update_ids)} existing rows")
+            except Exception as e:
+                logger.error(f"Error updating sheet: {e}")
+
+        return results
+
+    def get_application(self, investment_id):
+        """Return application record by investment ID or None"""
+        row = self._find_row_by_investment_id(investment_id)
+        if row is None:
+            return None
+        try:
+            values = self.sheet.row_values(row)
+            if not values or values[0] != investment_id:
+                # Row moved by a manual edit
+                self.resync_index({investment_id: row})
+                row = self._find_row_by_investment_id(investment_id)
+                if row is None:
+                    return None
+                values = self.sheet.row_values(row)
         except Exception as e:
-            logger.error(f"Error saving to sheet: {e}")
-            return False 
\ No newline at end of file
+            logger.error(f"Error reading row: {e}")
+            return None
+        values += [''] * (len(self.FIELDS) - len(values))
+        return dict(zip(self.FIELDS, values))
+
+    def _appended_first_row(self, response):
+        """Get first row number written by append_rows"""
+        try:
+            # e.g. "Sheet1!A10:H12"
+            updated_range = response['updates']['updatedRange']
+            start = updated_range.split('!')[-1].split(':')[0]
+            return int(start.lstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+        except (KeyError, TypeError, ValueError):
+            return self.index.last_row() + 1
@@ -0,0 +1,172 @@
+"""Streaming export of applications from primary storage
+
+Applications are read in pages and passed through generators, so memory
+use does not depend on the number of rows.
+
+    python export.py --format csv --output applications.csv --since 2024-01-01 --status completed
+    python export.py --summary --language ru
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+import logging
+
+logger = logging.getLogger(__name__)
+
+FIELDS = [
+    'investment_id',
+    'created_at',
+    'telegram_id',
+    'full_name',
+    'investment_amount',
+    'email',
+    'tx_hash',
+    'wallet_address',
+    'language',
+    'status'
+]
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+def iter_applications(storage, page_size=500, **filters):
+    """Yield filtered application records page by page"""
+    after = 0
+    while True:
+        page = storage.list_applications(after=after, limit=page_size, **filters)
+        for record in page:
+            after = record.pop('rowid')
+            record.pop('version', None)
+            record.pop('mirrored_version', None)
+            yield record
+        if len(page) < page_size:
+            return
+
+def batched(records, size):
+    """Group records into lists of at most size"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def write_csv(records, f):
+    """Write records as CSV, return number of rows"""
+    writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    count = 0
+    for record in records:
+        writer.writerow(record)
+        count += 1
+    return count
+
+def write_jsonl(records, f):
+    """Write records as JSON lines, return number of rows"""
+    count = 0
+    for record in records:
+        f.write(json.dumps({field: record.get(field) for field in FIELDS}, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+def write_parquet(records, path, row_group_size=10000):
+    """Write records as Parquet row groups, needs pyarrow"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow, install it with pip install pyarrow")
+
+    schema = pa.schema([
+        ('investment_id', pa.string()),
+        ('created_at', pa.string()),
+        ('telegram_id', pa.int64()),
+        ('full_name', pa.string()),
+        ('investment_amount', pa.float64()),
+        ('email', pa.string()),
+        ('tx_hash', pa.string()),
+        ('wallet_address', pa.string()),
+        ('language', pa.string()),
+        ('status', pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in batched(records, row_group_size):
+            columns = {field: [record.get(field) for record in batch] for field in FIELDS}
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            count += len(batch)
+    return count
+
+def export(storage, fmt, output, **filters):
+    """Export filtered applications to output path, '-' is stdout. Return number of rows"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt}, expected one of {', '.join(FORMATS)}")
+    records = iter_applications(storage, **filters)
+    if fmt == 'parquet':
+        if output == '-':
+            raise ValueError("Parquet export needs an output file")
+        return write_parquet(records, output)
+
+    writer = write_csv if fmt == 'csv' else write_jsonl
+    if output == '-':
+        return writer(records, sys.stdout)
+    with open(output, 'w', encoding='utf-8', newline='') as f:
+        return writer(records, f)
+
+def date_filters(since=None, until=None):
+    """Convert inclusive ISO dates to created_at bounds"""
+    filters = {}
+    if since:
+        filters['created_from'] = datetime.date.fromisoformat(since).isoformat()
+    if until:
+        filters['created_before'] = (datetime.date.fromisoformat(until) + datetime.timedelta(days=1)).isoformat()
+    return filters
+
+def format_summary(summary):
+    """Render summary returned by storage.summarize as text"""
+    lines = [f"Applications: {summary['count']}", f"Investment Amount $: {summary['amount']:,.2f}"]
+    for status, item in sorted(summary['by_status'].items()):
+        lines.append(f"  {status}: {item['count']} (${item['amount']:,.2f})")
+    return '\n'.join(lines)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export applications from storage")
+    parser.add_argument('--db', default=os.getenv('SQLITE_PATH', 'bot.db'))
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--output', default='-', help="Output file, - for stdout")
+    parser.add_argument('--since', help="First day to include, YYYY-MM-DD")
+    parser.add_argument('--until', help="Last day to include, YYYY-MM-DD")
+    parser.add_argument('--status', choices=['submitted', 'completed'])
+    parser.add_argument('--language')
+    parser.add_argument('--min-amount', type=float)
+    parser.add_argument('--max-amount', type=float)
+    parser.add_argument('--summary', action='store_true', help="Print totals instead of exporting")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    from storage import SQLiteStorage
+
+    args = parse_args(argv)
+    filters = date_filters(args.since, args.until)
+    filters.update(
+        status=args.status, language=args.language,
+        min_amount=args.min_amount, max_amount=args.max_amount
+    )
+    storage = SQLiteStorage(args.db)
+    try:
+        if args.summary:
+            print(format_summary(storage.summarize(**filters)))
+        else:
+            count = export(storage, args.format, args.output, **filters)
+            logger.info(f"Exported {count} applications")
+    finally:
+        storage.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stderr)
+    main()
@@ -0,0 +1,80 @@
+import json
+import threading
+import logging
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+logger = logging.getLogger(__name__)
+
+class HealthServer:
+    """Small HTTP server for orchestrator probes
+
+    /healthz answers 200 while the process runs. /readyz answers 200 when
+    every critical check passes and 503 otherwise. Both return the state
+    of all checks as JSON. More endpoints can be added with add_route.
+    """
+
+    def __init__(self, host='0.0.0.0', port=8080):
+        self.host = host
+        self.port = port
+        self._checks = {}
+        self._routes = {
+            '/healthz': lambda: self._report(critical_only=False),
+            '/readyz': lambda: self._report(critical_only=True),
+        }
+        self._server = None
+
+    def add_check(self, name, check, critical=True):
+        """Register check() returning (ok, detail)"""
+        self._checks[name] = (check, critical)
+
+    def add_route(self, path, handler):
+        """Register handler() returning (status, content_type, body)"""
+        self._routes[path] = handler
+
+    def _report(self, critical_only):
+        checks = {}
+        ready = True
+        for name, (check, critical) in self._checks.items():
+            try:
+                ok, detail = check()
+            except Exception as e:
+                ok, detail = False, str(e)
+            checks[name] = {'ok': ok, 'detail': detail, 'critical': critical}
+            if critical and not ok:
+                ready = False
+        status = 200 if ready or not critical_only else 503
+        body = json.dumps({'ready': ready, 'checks': checks}, default=str)
+        return status, 'application/json', body
+
+    def start(self):
+        """Serve in background thread"""
+        routes = self._routes
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                handler = routes.get(self.path.split('?')[0])
+                if handler is None:
+                    self.send_error(404)
+                    return
+                status, content_type, body = handler()
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                # Probes are too frequent for the log
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='health', daemon=True).start()
+        logger.info(f"Health server listening on {self.host}:{self.port}")
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,65 @@
+from functools import lru_cache
+from types import MappingProxyType
+from telebot import types
+from texts import LANGUAGES, MESSAGES
+
+# Language button label -> language code
+LANGUAGE_BUTTONS = MappingProxyType({MESSAGES.labels[lang]: lang for lang in LANGUAGES})
+
+# Admin menu buttons
+ADMIN_CONFIRM_BUTTON = "✅ Подтвердить пользователя"
+ADMIN_ADD_BUTTON = "➕ Добавить админа"
+ADMIN_LIST_BUTTON = "👥 Список админов"
+ADMIN_PENDING_BUTTON = "📋 Ожидающие заявки"
+
+def _serialize(*rows):
+    """Build reply keyboard and serialize it once"""
+    keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
+    for row in rows:
+        keyboard.add(*[types.KeyboardButton(label) for label in row])
+    return keyboard.to_json()
+
+# Keyboards are passed to the API as prebuilt JSON strings
+LANGUAGE_KEYBOARD = _serialize(list(LANGUAGE_BUTTONS))
+
+ADMIN_KEYBOARD = _serialize(
+    [ADMIN_CONFIRM_BUTTON, ADMIN_ADD_BUTTON],
+    [ADMIN_PENDING_BUTTON, ADMIN_LIST_BUTTON]
+)
+
+REMOVE_KEYBOARD = types.ReplyKeyboardRemove().to_json()
+
+def pending_keyboard(investment_ids, page, pages):
+    """Inline keyboard of one page of the pending applications view
+
+    Callback data is confirm:<page>:<investment ID>, confirm_page:<page>
+    or pending:<page>.
+    """
+    keyboard = types.InlineKeyboardMarkup(row_width=2)
+    keyboard.add(*[
+        types.InlineKeyboardButton(f"✅ {investment_id}", callback_data=f"confirm:{page}:{investment_id}")
+        for investment_id in investment_ids
+    ])
+    keyboard.row(types.InlineKeyboardButton(
+        f"✅ Подтвердить все ({len(investment_ids)})", callback_data=f"confirm_page:{page}"
+    ))
+    navigation = []
+    if page > 0:
+        navigation.append(types.InlineKeyboardButton("◀️", callback_data=f"pending:{page - 1}"))
+    navigation.append(types.InlineKeyboardButton(f"{page + 1}/{pages} 🔄", callback_data=f"pending:{page}"))
+    if page < pages - 1:
+        navigation.append(types.InlineKeyboardButton("▶️", callback_data=f"pending:{page + 1}"))
+    keyboard.row(*navigation)
+    return keyboard.to_json()
+
+# Per-language keyboards are built on first use of the language
+
+@lru_cache(maxsize=None)
+def reviewed_keyboard(lang):
+    """Keyboard with pitch deck reviewed button"""
+    return _serialize([MESSAGES[lang]['reviewed_button']])
+
+@lru_cache(maxsize=None)
+def document_signed_keyboard(lang):
+    """Keyboard with document signed button"""
+    return _serialize([MESSAGES[lang]['document_signed_button']])
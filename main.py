@@ -1,11 +1,28 @@
 import telebot
-from telebot import types
-import re
 import logging
-from translation import TEXTS
-from excel_service import ExcelService
-import json
+from texts import MESSAGES
+import keyboards
+from storage import SQLiteStorage, LazyStorage, application_record
+from export import date_filters, format_summary
+from health import HealthServer
+from id_generator import IdGenerator, normalize_id, NODE_BITS
+from coordination import SQLiteCoordination, Lease, KeyLock, SharedMap, allocate_node_id, instance_name
+from mirror import SheetsMirrorSync
+from admin_registry import AdminRegistry
+import metrics
+from metrics import HANDLER_SECONDS, EXTERNAL_CALL_SECONDS, FUNNEL_TRANSITIONS, FUNNEL_DROPOFFS
+from profile_cache import ProfileCache
+from session_store import SessionStore
+from write_queue import WriteBehindQueue
+from dispatch import PooledTeleBot
+from dedup import ProcessedUpdates
+from broadcast import Broadcaster
+from outbox import MessageDispatcher, PRIORITY_ADMIN
+from validators import validate_email, validate_name, validate_hash, validate_wallet, check_amount
+from state_machine import ConversationEngine, Step, InvalidInput, checked
 import os
+import argparse
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -18,254 +35,399 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize bot
-bot = telebot.TeleBot(os.getenv('TELEGRAM_BOT_TOKEN'))
+# Several bot processes on one host share state when COORDINATION is sqlite
+coordination = None
+instance = instance_name()
+if os.getenv('COORDINATION') == 'sqlite':
+    coordination = SQLiteCoordination(os.getenv('SQLITE_PATH', 'bot.db'))
+elif os.getenv('COORDINATION'):
+    raise SystemExit(f"Unknown COORDINATION {os.getenv('COORDINATION')}, expected sqlite")
+
+# Initialize bot, updates are handled by per-chat ordered workers
+bot = PooledTeleBot(
+    os.getenv('TELEGRAM_BOT_TOKEN'),
+    pool_size=int(os.getenv('UPDATE_WORKERS', '8')),
+    # Redelivered updates are dropped, processes sharing the database share the record
+    processed_updates=ProcessedUpdates(os.getenv('SQLITE_PATH', 'bot.db')),
+    # One process at a time handles a chat, sessions are read-modify-write
+    chat_locks=KeyLock(coordination, 'chat:', instance) if coordination else None
+)
 
-def load_admins():
-    """Load admin IDs from file"""
-    try:
-        with open('admins.json', 'r') as f:
-            return set(json.load(f))
-    except FileNotFoundError:
-        # Create file with initial admin
-        admin_ids = {os.getenv('ADMIN_ID')}  # Your initial admin ID
-        save_admins(admin_ids)
-        return admin_ids
-
-def save_admins(admin_ids):
-    """Save admin IDs to file"""
-    with open('admins.json', 'w') as f:
-        json.dump(list(admin_ids), f)
+# Point the bot at another Bot API server, e.g. a local fake for tests
+if os.getenv('TELEGRAM_API_URL'):
+    telebot.apihelper.API_URL = os.getenv('TELEGRAM_API_URL').rstrip('/') + '/bot{0}/{1}'
 
 # Initialize admins set
-ADMIN_IDS = load_admins()
+ADMIN_IDS = AdminRegistry('admins.json', initial_admin=os.getenv('ADMIN_ID'))
+
+# All outgoing messages go through the rate-limited dispatcher
+outbox = MessageDispatcher(
+    bot,
+    workers=int(os.getenv('OUTBOX_WORKERS', '4')),
+    global_rate=float(os.getenv('OUTBOX_GLOBAL_RATE', '30')),
+    per_chat_rate=float(os.getenv('OUTBOX_CHAT_RATE', '1'))
+)
+broadcaster = Broadcaster(outbox)
+
+# Initialize primary storage
+storage = SQLiteStorage(os.getenv('SQLITE_PATH', 'bot.db'))
+
+# Investment IDs, node ID must differ between bot processes
+node_lease = None
+if coordination:
+    # Another process may take the node ID while the lease is lost
+    node_id, node_lease = allocate_node_id(
+        coordination, instance, 2 ** NODE_BITS,
+        on_acquired=lambda: id_generator.resume(), on_lost=lambda: id_generator.suspend()
+    )
+else:
+    node_id = int(os.getenv('NODE_ID', '0'))
+id_generator = IdGenerator(node_id, os.getenv('SQLITE_PATH', 'bot.db'))
+
+# Latency and funnel metrics, served on /metrics of the health server
+if os.getenv('METRICS') == '1':
+    metrics.enable()
+
+def record_dropoffs(counts):
+    """Count evicted sessions as funnel drop-offs"""
+    for state, count in counts.items():
+        FUNNEL_DROPOFFS.inc(state, amount=count)
+
+# User state storage, cached sessions would go stale when shared between processes.
+# Applications waiting on an admin or on signed documents are never evicted
+sessions = SessionStore(
+    os.getenv('SQLITE_PATH', 'bot.db'),
+    ttl=int(os.getenv('SESSION_TTL', str(7 * 24 * 3600))),
+    cache_size=0 if coordination else 1000,
+    on_evict=record_dropoffs,
+    waiting_states=('waiting_for_admin', 'document_sent')
+)
+metrics.Gauge(
+    'bot_sessions', 'Live sessions by conversation state', ['state'],
+    collect=lambda: {(state,): count for state, count in sessions.count_states().items()}
+)
+metrics.Gauge(
+    'bot_update_queue_depth', 'Updates waiting per chat worker shard', ['shard'],
+    collect=lambda: {(stats['shard'],): stats['depth'] for stats in bot.update_pool.stats()}
+)
+metrics.Gauge(
+    'bot_update_lag_seconds', 'Time the last update of each shard waited in queue', ['shard'],
+    collect=lambda: {(stats['shard'],): stats['lag'] for stats in bot.update_pool.stats()}
+)
+metrics.Gauge(
+    'bot_update_busy_seconds', 'Time each shard has spent on its current update', ['shard'],
+    collect=lambda: {(stats['shard'],): stats['busy_for'] for stats in bot.update_pool.stats()}
+)
 
-# Initialize excel service
-excel_service = ExcelService()
+# Google Sheets is an optional mirror, written in background.
+# It connects in background too, so a Sheets outage does not block startup
+write_queue = None
+mirror_sync = None
+leader_lease = None
+sheets = None
+if os.getenv('SHEETS_MIRROR', '1') == '1':
+    from excel_service import ExcelService
+    sheets = LazyStorage(ExcelService, name='sheets')
+    if coordination:
+        # Only the leader process writes to the sheet, it connects on becoming leader
+        mirror_sync = SheetsMirrorSync(storage, sheets.start).start()
+        leader_lease = Lease(
+            coordination, 'sheets-leader', instance,
+            on_acquired=mirror_sync.activate, on_lost=mirror_sync.deactivate
+        ).start()
+    else:
+        write_queue = WriteBehindQueue(sheets.start())
+
+# Readiness and health probes for the orchestrator
+accepting_updates = threading.Event()
+health_server = None
+if os.getenv('HEALTH_PORT'):
+    health_server = HealthServer(os.getenv('HEALTH_HOST', '0.0.0.0'), int(os.getenv('HEALTH_PORT')))
+    health_server.add_check('updates', lambda: (accepting_updates.is_set(), None))
+    health_server.add_check(
+        'update_queue', lambda: (True, {'depth': bot.update_pool.queue_depth()}), critical=False
+    )
+    if sheets:
+        # Records are buffered while the sheet is unavailable, so it is not critical
+        health_server.add_check('sheets', lambda: (sheets.ready, sheets.status()), critical=False)
+    if write_queue:
+        health_server.add_check('write_queue', lambda: (True, {'pending': write_queue.pending_count()}), critical=False)
+    if metrics.is_enabled():
+        health_server.add_route('/metrics', metrics.metrics_route)
+    health_server.start()
 
 # Update is_admin function
 def is_admin(user_id):
     """Check if user is admin"""
     return user_id in ADMIN_IDS
 
-# Update admin keyboard function
-def create_admin_keyboard():
-    """Create keyboard for admin"""
-    keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
-    keyboard.add(
-        types.KeyboardButton("✅ Подтвердить пользователя"),
-        types.KeyboardButton("➕ Добавить админа")
-    )
-    keyboard.add(
-        types.KeyboardButton("👥 Список админов")
-    )
-    return keyboard
-
-# Update admin message handler
-def handle_admin_messages(message):
-    """Handle admin messages"""
-    chat_id = message.chat.id
-    
-    if message.text == "✅ Подтвердить пользователя":
-        admin_state[chat_id] = 'waiting_for_id'
-        bot.send_message(
-            chat_id,
-            "Введите ID операции для подтверждения:"
-        )
-        return
-    
-    elif message.text == "➕ Добавить админа":
-        admin_state[chat_id] = 'waiting_for_admin_id'
-        bot.send_message(
-            chat_id,
-            "Введите Telegram ID нового администратора:"
-        )
-        return
-        
-    elif message.text == "👥 Список админов":
-        show_admin_list(message)
-        return
-        
-    if admin_state.get(chat_id) == 'waiting_for_id':
-        process_admin_confirmation(message)
-        return
-        
-    if admin_state.get(chat_id) == 'waiting_for_admin_id':
-        process_add_admin(message)
-        return
-
 def process_add_admin(message):
     """Process adding new admin"""
     chat_id = message.chat.id
     try:
         new_admin_id = int(message.text.strip())
-        if new_admin_id in ADMIN_IDS:
-            bot.reply_to(message, "Этот пользователь уже является администратором.")
+        if not ADMIN_IDS.add(new_admin_id):
+            outbox.reply_to(message, "Этот пользователь уже является администратором.")
             admin_state[chat_id] = None
             return
-            
-        ADMIN_IDS.add(new_admin_id)
-        save_admins(ADMIN_IDS)
         
         # Notify current admin
-        bot.reply_to(
+        outbox.reply_to(
             message, 
             f"✅ Новый администратор (ID: {new_admin_id}) успешно добавлен"
         )
         
-        # Try to notify new admin
-        try:
-            bot.send_message(
-                new_admin_id,
-                "Вам были предоставлены права администратора. Используйте /start для начала работы.",
-            )
-        except Exception as e:
-            logger.error(f"Failed to notify new admin: {e}")
-            bot.reply_to(
-                message,
-                "Примечание: Не ��далось отправить уведомление новому администратору. "
-                "Возможно, бот не был активирован пользователем."
-            )
+        # Try to notify new admin, the handler does not wait for delivery
+        def report_failure(future):
+            result = future.result()
+            if not result['ok']:
+                logger.error(f"Failed to notify new admin: {result['error']}")
+                outbox.reply_to(
+                    message,
+                    "Примечание: Не ��далось отправить уведомление новому администратору. "
+                    "Возможно, бот не был активирован пользователем."
+                )
+
+        outbox.send_message(
+            new_admin_id,
+            "Вам были предоставлены права администратора. Используйте /start для начала работы.",
+        ).add_done_callback(report_failure)
             
     except ValueError:
-        bot.reply_to(message, "❌ Неверный формат ID. Пожалуйста, введите числовой ID.")
+        outbox.reply_to(message, "❌ Неверный формат ID. Пожалуйста, введите числовой ID.")
     
     admin_state[chat_id] = None
 
 # Update start command handler to use new admin check
 @bot.message_handler(commands=['start'])
+@metrics.timed(HANDLER_SECONDS, 'start', '')
 def start(message):
     """Handle /start command"""
     if is_admin(message.from_user.id):
         logger.info(f"Admin logged in: {message.from_user.id}")
-        bot.send_message(
+        outbox.send_message(
             message.chat.id,
             "Вы вошли как администратор.",
-            reply_markup=create_admin_keyboard()
+            reply_markup=keyboards.ADMIN_KEYBOARD
         )
         return
 
     # Generate unique investment ID
-    investment_id = excel_service.get_next_id()
-    user_data[message.chat.id] = {
+    investment_id = id_generator.next_id()
+    sessions.save(message.chat.id, {
         'state': 'selecting_language',
         'investment_id': investment_id
-    }
+    })
+    FUNNEL_TRANSITIONS.inc('', 'selecting_language')
     logger.info(f"New user started: {message.chat.id}, Investment ID: {investment_id}")
-    bot.send_message(
+    outbox.send_message(
         message.chat.id,
         "Welcome! Please select your language:",
-        reply_markup=create_language_keyboard()
+        reply_markup=keyboards.LANGUAGE_KEYBOARD
     )
 
-logger.info("Bot initialized successfully")
+@bot.message_handler(commands=['report'], func=lambda message: is_admin(message.from_user.id))
+@metrics.timed(HANDLER_SECONDS, 'send_report', '')
+def send_report(message):
+    """Send application totals, optional arguments are first and last day"""
+    try:
+        filters = date_filters(*message.text.split()[1:3])
+    except ValueError:
+        outbox.reply_to(message, "Формат: /report [ГГГГ-ММ-ДД] [ГГГГ-ММ-ДД]")
+        return
+    outbox.reply_to(message, format_summary(storage.summarize(**filters)))
 
-# User state storage
-user_data = {}
-
-def create_language_keyboard():
-    """Create keyboard for language selection"""
-    keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
-    keyboard.add(
-        types.KeyboardButton("English 🇬🇧"),
-        types.KeyboardButton("Русский 🇷🇺"),
-        types.KeyboardButton("中文 🇨🇳"),
-        types.KeyboardButton("Indonesia 🇮🇩"),
-        types.KeyboardButton("Filipino 🇵🇭"),
-        types.KeyboardButton("Tiếng Việt 🇻🇳")
-    )
-    return keyboard
+logger.info("Bot initialized successfully")
 
-@bot.message_handler(func=lambda message: user_data.get(message.chat.id, {}).get('state') == 'selecting_language')
+@bot.message_handler(func=lambda message: sessions.get(message.chat.id, {}).get('state') == 'selecting_language')
+@metrics.timed(HANDLER_SECONDS, 'handle_language_selection', 'selecting_language')
 def handle_language_selection(message):
     """Handle language selection"""
-    lang_map = {
-        "English 🇬🇧": "en",
-        "Русский 🇷🇺": "ru",
-        "中文 🇨🇳": "zh",
-        "Indonesia 🇮🇩": "id",
-        "Filipino 🇵🇭": "fil",
-        "Tiếng Việt 🇻🇳": "vi"
-    }
-    
-    if message.text not in lang_map:
-        bot.reply_to(message, "Please select a language from the keyboard.")
+    if message.text not in keyboards.LANGUAGE_BUTTONS:
+        outbox.reply_to(message, "Please select a language from the keyboard.")
         return
 
-    user_data[message.chat.id]['language'] = lang_map[message.text]
-    user_data[message.chat.id]['state'] = 'reviewing_pitch'
+    session = sessions.get(message.chat.id)
+    session['language'] = keyboards.LANGUAGE_BUTTONS[message.text]
+    session['state'] = 'reviewing_pitch'
+    sessions.save(message.chat.id, session)
+    FUNNEL_TRANSITIONS.inc('selecting_language', 'reviewing_pitch')
     
     # Send pitch deck and button
-    keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
-    keyboard.add(types.KeyboardButton(
-        TEXTS['reviewed_button'][user_data[message.chat.id]['language']]
-    ))
-    
     # Сначала отправляем сообщение
-    bot.send_message(
+    outbox.send_message(
         message.chat.id,
-        TEXTS['pitch_deck'][user_data[message.chat.id]['language']],
-        reply_markup=keyboard
+        MESSAGES[session['language']]['pitch_deck'],
+        reply_markup=keyboards.reviewed_keyboard(session['language'])
     )
     
     # Выбираем URL в зависимости от языка
     pitch_deck_url = (
         "https://drive.google.com/file/d/1TTR_AcJ8Q_nPYf5zO1ZpqVVrDBx0RPn3/view?usp=sharing" 
-        if user_data[message.chat.id]['language'] == 'ru'
+        if session['language'] == 'ru'
         else "https://drive.google.com/file/d/1sHlPIp8_baVQ2KhU5OUaepG7g0bElLvO/view?usp=sharing"
     )
     
-    bot.send_message(
+    outbox.send_message(
         message.chat.id,
         f"[Click here to view Pitch Deck]({pitch_deck_url})",
         parse_mode='Markdown'
     )
 
-def validate_email(email):
-    """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
-
-def validate_name(name, lang='en'):
-    """Validate name format based on language"""
-    if lang == 'zh':
-        # For Chinese names, just check if it's not empty and has at least 2 characters
-        return len(name.strip()) >= 2
+# Add new state for admin
+admin_state = SharedMap(coordination, 'admin_state:', ttl=3600) if coordination else {}
+
+def save_application(investment_id, telegram_id, full_name, investment_amount, email, tx_hash="", wallet_address="",
+                     language=None, step=None):
+    """Save application to storage and queue it for the sheet mirror
+
+    step is the idempotency key of the save together with the investment
+    ID. Saving a step again writes and queues nothing and returns None.
+    """
+    if step:
+        record = application_record(
+            investment_id, telegram_id, full_name, investment_amount, email, tx_hash, wallet_address, language
+        )
+        success = storage.save_step(record, step)
+        if success is None:
+            logger.warning(f"Step {step} of {investment_id} was already saved, skipping")
+            return None
     else:
-        # For other languages, allow letters, spaces, commas, and numbers
-        # Remove extra spaces and commas
-        name = ' '.join(name.split())  # Remove extra spaces
-        name = name.replace(' ,', ',').replace(', ', ',')  # Normalize commas
-        
-        # Split by comma or space
-        parts = [p for p in name.replace(',', ' ').split() if p]
-        
-        # Check if we have at least 2 parts and each part is at least 2 characters
-        if len(parts) < 2:
-            return False
-            
-        # Allow letters, numbers, and basic punctuation
-        allowed_chars = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-'")
-        
-        # Check each part
-        for part in parts:
-            if len(part) < 2 or not all(c in allowed_chars for c in part):
-                return False
-                
-        return True
-
-def validate_hash(tx_hash):
-    """Validate transaction hash format"""
-    pattern = r'^0x[0-9a-fA-F]{64}$'
-    return re.match(pattern, tx_hash) is not None
-
-def validate_wallet(wallet):
-    """Validate wallet address format"""
-    pattern = r'^0x[0-9a-fA-F]{40}$'
-    return re.match(pattern, wallet) is not None
+        success = storage.save_user_data(
+            investment_id, telegram_id, full_name, investment_amount, email, tx_hash, wallet_address, language
+        )
+    if not success:
+        return False
+    # With coordination the leader mirrors from storage instead
+    if write_queue:
+        write_queue.enqueue(
+            investment_id, telegram_id, full_name, investment_amount, email, tx_hash, wallet_address
+        )
+    return True
+
+def button_pressed(key):
+    """Validator accepting only the given keyboard button"""
+    def validator(text, session):
+        if text != MESSAGES[session.get('language', 'en')][key]:
+            raise InvalidInput()
+        return text
+    return validator
+
+def name_input(text, session):
+    """Validate full name in the user's language"""
+    if not validate_name(text, session.get('language', 'en')):
+        raise InvalidInput('invalid_name')
+    return text
+
+def amount_input(text, session):
+    """Parse investment amount"""
+    error = check_amount(text)
+    if error:
+        raise InvalidInput(error)
+    return float(text)
+
+def documents_signed_input(text, session):
+    """Accept only the document signed button"""
+    if text != MESSAGES[session.get('language', 'en')]['document_signed_button']:
+        raise InvalidInput(text="Please click the button when you have reviewed and signed the documents.")
+    return text
+
+def submit_application(chat_id, session):
+    """Save initial application data and notify admins"""
+    logger.info(f"User {chat_id} submitted email: {session['email']}")
+
+    # Save initial data
+    success = save_application(
+        session['investment_id'],
+        chat_id,
+        session['full_name'],
+        session['investment_amount'],
+        session['email'],
+        language=session.get('language'),
+        step='submitted'
+    )
+    if success is None:
+        # Repeated submission, admins already know about it
+        return
+    if not success:
+        logger.error(f"Failed to save initial data for user {chat_id}")
+        # User stays on this step and can send the email again
+        raise InvalidInput('record_error')
+    logger.info(f"Initial data saved for user {chat_id}")
+
+    # Отправляем сообщение админу на русском
+    admin_message = (
+        f"*Новая заявка на инвестицию:*\n"
+        f"ID операции: `{session['investment_id']}`\n"
+        f"Telegram ID: `{chat_id}`\n"
+        f"ФИО: {escape_markdown(session['full_name'])}\n"
+        f"Email: {escape_markdown(session['email'])}\n"
+        f"Сумма: ${session['investment_amount']}\n\n"
+    )
+    send_admin_message(admin_message)
+
+def complete_application(chat_id, session):
+    """Save final application data"""
+    success = save_application(
+        session['investment_id'],
+        chat_id,
+        session['full_name'],
+        session['investment_amount'],
+        session['email'],
+        session['tx_hash'],
+        session['wallet_address'],
+        step='completed'
+    )
+    if success is False:
+        raise InvalidInput('record_error')
 
-# Add new state for admin
-admin_state = {}
+def count_transition(chat_id, old_state, new_state, session):
+    """Count funnel transitions, None is the end of the conversation"""
+    FUNNEL_TRANSITIONS.inc(old_state, new_state or 'completed')
+
+def persist_session(chat_id, old_state, new_state, session):
+    """Save session on every transition, clear it when conversation ends"""
+    if new_state is None:
+        sessions.delete(chat_id)
+    else:
+        sessions.save(chat_id, session)
+
+# User conversation: state -> step
+conversation = ConversationEngine({
+    'reviewing_pitch': Step(
+        'entering_name', 'enter_name',
+        validator=button_pressed('reviewed_button'),
+        reply_markup=keyboards.REMOVE_KEYBOARD
+    ),
+    'entering_name': Step(
+        'entering_amount', 'enter_amount',
+        validator=name_input, field='full_name'
+    ),
+    'entering_amount': Step(
+        'entering_email', 'enter_email',
+        validator=amount_input, field='investment_amount'
+    ),
+    'entering_email': Step(
+        'waiting_for_admin', 'wait_for_confirmation',
+        validator=checked(validate_email, 'invalid_email'), field='email',
+        action=submit_application
+    ),
+    'document_sent': Step(
+        'entering_hash', 'enter_hash',
+        validator=documents_signed_input
+    ),
+    'entering_hash': Step(
+        'entering_wallet', 'enter_wallet',
+        validator=checked(validate_hash, 'invalid_hash'), field='tx_hash'
+    ),
+    'entering_wallet': Step(
+        None, 'success',
+        validator=checked(validate_wallet, 'invalid_wallet'), field='wallet_address',
+        action=complete_application
+    )
+})
+conversation.add_hook(persist_session)
+conversation.add_hook(count_transition)
 
 @bot.message_handler(func=lambda message: True)
 def handle_all_messages(message):
@@ -277,146 +439,52 @@ def handle_all_messages(message):
         handle_admin_messages(message)
         return
         
-    if chat_id not in user_data:
+    session = sessions.get(chat_id)
+    if session is None:
         start(message)
         return
 
-    state = user_data[chat_id].get('state')
-    lang = user_data[chat_id].get('language', 'en')
+    state = session.get('state')
+    lang = session.get('language', 'en')
     logger.info(f"Processing message from {chat_id}, State: {state}, Lang: {lang}")
 
-    if state == 'reviewing_pitch' and message.text == TEXTS['reviewed_button'][lang]:
-        user_data[chat_id]['state'] = 'entering_name'
-        # Remove keyboard and send new message
-        remove_keyboard = types.ReplyKeyboardRemove()
-        bot.send_message(
-            chat_id, 
-            TEXTS['enter_name'][lang],
-            reply_markup=remove_keyboard
-        )
-
-    elif state == 'entering_name':
-        if validate_name(message.text, lang):
-            user_data[chat_id]['full_name'] = message.text
-            user_data[chat_id]['state'] = 'entering_amount'
-            bot.send_message(chat_id, TEXTS['enter_amount'][lang])
-        else:
-            bot.send_message(chat_id, TEXTS['invalid_name'][lang])
-
-    elif state == 'entering_amount':
-        try:
-            amount = float(message.text)
-            if amount < 10000:
-                bot.send_message(chat_id, TEXTS['minimum_amount'][lang])
-            else:
-                user_data[chat_id]['investment_amount'] = amount
-                user_data[chat_id]['state'] = 'entering_email'
-                bot.send_message(chat_id, TEXTS['enter_email'][lang])
-        except ValueError:
-            bot.send_message(chat_id, TEXTS['invalid_amount'][lang])
-
-    elif state == 'entering_email':
-        if validate_email(message.text):
-            user_data[chat_id]['email'] = message.text
-            user_data[chat_id]['state'] = 'waiting_for_admin'
-            logger.info(f"User {chat_id} submitted email: {message.text}")
-            
-            # Отправляем сообщение админу на русском
-            admin_message = (
-                f"*Новая заявка на инвестицию:*\n"
-                f"ID операции: `{user_data[chat_id]['investment_id']}`\n"
-                f"Telegram ID: `{chat_id}`\n"
-                f"ФИО: {user_data[chat_id]['full_name']}\n"
-                f"Email: {user_data[chat_id]['email']}\n"
-                f"Сумма: ${user_data[chat_id]['investment_amount']}\n\n"
-            )
-            send_admin_message(admin_message)
-            
-            # Save initial data to sheet
-            success = excel_service.save_user_data(
-                user_data[chat_id]['investment_id'],
-                chat_id,
-                user_data[chat_id]['full_name'],
-                user_data[chat_id]['investment_amount'],
-                user_data[chat_id]['email']
-            )
-            
-            if success:
-                logger.info(f"Initial data saved for user {chat_id}")
-                # Send confirmation message to user in their language
-                bot.send_message(
-                    chat_id, 
-                    TEXTS['wait_for_confirmation'][lang]
-                )
-            else:
-                logger.error(f"Failed to save initial data for user {chat_id}")
-                bot.send_message(chat_id, TEXTS['record_error'][lang])
-        else:
-            bot.send_message(chat_id, TEXTS['invalid_email'][lang])
-
-    elif state == 'document_sent':
-        if message.text == TEXTS['document_signed_button'][lang]:
-            user_data[chat_id]['state'] = 'entering_hash'
-            bot.send_message(chat_id, TEXTS['enter_hash'][lang])
-        else:
-            bot.send_message(
-                chat_id,
-                "Please click the button when you have reviewed and signed the documents."
-            )
-
-    elif state == 'entering_hash':
-        if validate_hash(message.text):
-            user_data[chat_id]['tx_hash'] = message.text
-            user_data[chat_id]['state'] = 'entering_wallet'
-            bot.send_message(chat_id, TEXTS['enter_wallet'][lang])
-        else:
-            bot.send_message(chat_id, TEXTS['invalid_hash'][lang])
-
-    elif state == 'entering_wallet':
-        if validate_wallet(message.text):
-            user_data[chat_id]['wallet_address'] = message.text
-            # Update Google Sheets with final data
-            success = excel_service.save_user_data(
-                user_data[chat_id]['investment_id'],
-                chat_id,
-                user_data[chat_id]['full_name'],
-                user_data[chat_id]['investment_amount'],
-                user_data[chat_id]['email'],
-                user_data[chat_id]['tx_hash'],
-                message.text
-            )
-            if success:
-                bot.send_message(chat_id, TEXTS['success'][lang])
-            else:
-                bot.send_message(chat_id, TEXTS['record_error'][lang])
-            # Clear user data
-            del user_data[chat_id]
+    with HANDLER_SECONDS.time('handle_all_messages', state):
+        reply = conversation.handle(chat_id, session, message.text)
+        if reply is None:
+            return
+        text = MESSAGES[lang][reply.key] if reply.key else reply.text
+        if reply.reply_markup:
+            outbox.send_message(chat_id, text, reply_markup=reply.reply_markup)
         else:
-            bot.send_message(chat_id, TEXTS['invalid_wallet'][lang])
+            outbox.send_message(chat_id, text)
 
 def handle_admin_messages(message):
     """Handle admin messages"""
     chat_id = message.chat.id
     
-    if message.text == "✅ Подтвердить пользователя":
+    if message.text == keyboards.ADMIN_CONFIRM_BUTTON:
         admin_state[chat_id] = 'waiting_for_id'
-        bot.send_message(
+        outbox.send_message(
             chat_id,
             "Введите ID операции для подтверждения:"
         )
         return
         
-    elif message.text == "➕ Добавить админа":
+    elif message.text == keyboards.ADMIN_ADD_BUTTON:
         admin_state[chat_id] = 'waiting_for_admin_id'
-        bot.send_message(
+        outbox.send_message(
             chat_id,
             "Введите Telegram ID нового администратора:"
         )
         return
         
-    elif message.text == "👥 Список админов":
+    elif message.text == keyboards.ADMIN_LIST_BUTTON:
         show_admin_list(message)
         return
+
+    elif message.text == keyboards.ADMIN_PENDING_BUTTON:
+        send_pending_page(chat_id, 0)
+        return
         
     if admin_state.get(chat_id) == 'waiting_for_id':
         process_admin_confirmation(message)
@@ -426,76 +494,243 @@ def handle_admin_messages(message):
         process_add_admin(message)
         return
 
+@metrics.timed(HANDLER_SECONDS, 'process_admin_confirmation', '')
 def process_admin_confirmation(message):
     """Process admin confirmation of user"""
     chat_id = message.chat.id
-    target_investment_id = message.text.strip()
-    
-    # Find user by investment ID
-    target_user_id = None
-    for user_id, data in user_data.items():
-        if data.get('investment_id') == target_investment_id:
-            target_user_id = user_id
-            break
+    target_investment_id = normalize_id(message.text)
     
-    if target_user_id and user_data[target_user_id]['state'] == 'waiting_for_admin':
-        user_data[target_user_id]['state'] = 'document_sent'
-        lang = user_data[target_user_id]['language']
-        
-        # Create keyboard for user
-        keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
-        keyboard.add(types.KeyboardButton(TEXTS['document_signed_button'][lang]))
-        
-        # Send message to user in their language
-        bot.send_message(
-            target_user_id,
-            TEXTS['documents_sent'][lang],
-            reply_markup=keyboard
-        )
-        
+    confirmed = confirm_applications([target_investment_id], report_to=chat_id)
+    if confirmed:
         logger.info(f"Confirmation sent for investment ID: {target_investment_id}")
-        bot.reply_to(
+        outbox.reply_to(
             message, 
             f"✅ Подтверждение отправлено\nID операции: {target_investment_id}"
         )
     else:
-        bot.reply_to(message, "❌ Заявка не найдена или не ожидает подтверждения")
+        outbox.reply_to(message, "❌ Заявка не найдена или не ожидает подтверждения")
     
     # Reset admin state
     admin_state[chat_id] = None
 
-def send_admin_message(message_text):
-    """Send message to admin in Russian"""
+def confirm_applications(investment_ids, report_to=None):
+    """Move applications waiting for admin to document_sent and notify users
+
+    Notifications are sent in background. Failed ones are logged and
+    reported to the report_to chat. Returns confirmed investment IDs.
+    """
+    moved = sessions.transition(investment_ids, 'waiting_for_admin', 'document_sent')
+    FUNNEL_TRANSITIONS.inc('waiting_for_admin', 'document_sent', amount=len(moved))
+
+    # Notifications go out concurrently, each user in their language
+    for chat_id, session in moved:
+        outbox.send_message(
+            chat_id,
+            MESSAGES[session['language']]['documents_sent'],
+            reply_markup=keyboards.document_signed_keyboard(session['language'])
+        ).add_done_callback(
+            lambda future, chat_id=chat_id, investment_id=session['investment_id']:
+                report_user_notification(future.result(), chat_id, investment_id, report_to)
+        )
+    return [session['investment_id'] for _, session in moved]
+
+def report_user_notification(status, chat_id, investment_id, report_to):
+    """Log failed confirmation notice and tell the admin who confirmed it"""
+    if status['ok']:
+        return
+    logger.error(f"Failed to notify user {chat_id} about {investment_id}: {status['error']}")
+    if report_to is not None:
+        outbox.send_message(
+            report_to,
+            f"❌ Не удалось уведомить пользователя {chat_id} (ID операции: {investment_id}): {status['error']}"
+        )
+
+# Per admin chat: message ID -> investment IDs shown in that pending view message
+pending_views = SharedMap(coordination, 'pending_view:', ttl=3600) if coordination else {}
+
+PENDING_PAGE_SIZE = 10
+PENDING_VIEWS_PER_CHAT = 20
+
+def remember_pending_view(chat_id, message_id, investment_ids):
+    """Store IDs shown in a pending view message, keeping the newest views of the chat"""
+    views = pending_views.get(chat_id) or {}
+    views.pop(str(message_id), None)
+    views[str(message_id)] = investment_ids
+    pending_views[chat_id] = dict(list(views.items())[-PENDING_VIEWS_PER_CHAT:])
+
+def send_pending_page(chat_id, page):
+    """Send page of applications waiting for admin as a new message"""
+    text, markup, investment_ids = render_pending_page(page)
+
+    # View is known by message ID once it is sent, before the admin can click it
+    def remember(future):
+        status = future.result()
+        if status['ok'] and investment_ids:
+            remember_pending_view(chat_id, status['message_id'], investment_ids)
+
+    outbox.send_message(chat_id, text, reply_markup=markup).add_done_callback(remember)
+
+def render_pending_page(page):
+    """Build text, inline keyboard and investment IDs of one page of applications waiting for admin"""
+    total = sessions.count_by_state('waiting_for_admin')
+    pages = max(1, -(-total // PENDING_PAGE_SIZE))
+    page = min(max(page, 0), pages - 1)
+    entries = sessions.list_by_state('waiting_for_admin', PENDING_PAGE_SIZE, page * PENDING_PAGE_SIZE)
+    investment_ids = [session['investment_id'] for _, session in entries]
+    if not entries:
+        return "Нет заявок, ожидающих подтверждения.", None, []
+
+    lines = [f"Ожидают подтверждения: {total} (стр. {page + 1}/{pages})", ""]
+    for _, session in entries:
+        lines.append(
+            f"{session['investment_id']} | {session.get('full_name', '')} | "
+            f"${session.get('investment_amount', '')} | {session.get('email', '')}"
+        )
+    return "\n".join(lines), keyboards.pending_keyboard(investment_ids, page, pages), investment_ids
+
+@bot.callback_query_handler(func=lambda call: is_admin(call.from_user.id))
+@metrics.timed(HANDLER_SECONDS, 'handle_admin_callback', '')
+def handle_admin_callback(call):
+    """Handle buttons of the pending applications view"""
+    chat_id = call.message.chat.id
+    message_id = call.message.message_id
+    action, _, value = call.data.partition(':')
+    page, _, investment_id = value.partition(':')
     try:
-        # Send to all admins
-        for admin_id in ADMIN_IDS:
-            bot.send_message(admin_id, message_text, parse_mode='Markdown')
-        logger.info(f"Admin message sent successfully")
-        return True
-    except Exception as e:
-        logger.error(f"Error sending admin message: {e}")
-        return False
+        page = int(page)
+    except ValueError:
+        outbox.answer_callback_query(chat_id, call.id, priority=PRIORITY_ADMIN)
+        return
+
+    notice = None
+    if action == 'confirm':
+        investment_ids = [investment_id]
+    elif action == 'confirm_page':
+        # Confirm exactly what the clicked message shows
+        investment_ids = (pending_views.get(chat_id) or {}).get(str(message_id), [])
+    else:
+        investment_ids = []
+
+    if investment_ids:
+        confirmed = confirm_applications(investment_ids, report_to=chat_id)
+        confirmed_ids = set(confirmed)
+        skipped = [i for i in investment_ids if i not in confirmed_ids]
+        notice = f"✅ Подтверждено: {len(confirmed)}"
+        if skipped:
+            notice += f"\n❌ Не ожидают подтверждения: {', '.join(skipped)}"
+        logger.info(f"Admin {call.from_user.id} confirmed {len(confirmed)} applications")
+        if action == 'confirm_page':
+            outbox.send_message(chat_id, notice)
+    outbox.answer_callback_query(chat_id, call.id, notice[:200] if notice else None, priority=PRIORITY_ADMIN)
+
+    text, markup, investment_ids = render_pending_page(page)
+    remember_pending_view(chat_id, message_id, investment_ids)
+    outbox.edit_message_text(chat_id, message_id, text, priority=PRIORITY_ADMIN, reply_markup=markup)
+
+@bot.callback_query_handler(func=lambda call: True)
+def handle_other_callback(call):
+    """Answer button presses of non-admins so the button stops loading"""
+    outbox.answer_callback_query(call.message.chat.id if call.message else call.from_user.id, call.id)
+
+def escape_markdown(text):
+    """Escape user input for parse_mode Markdown"""
+    text = str(text)
+    for char in ('_', '*', '`', '['):
+        text = text.replace(char, '\\' + char)
+    return text
 
+def send_admin_message(message_text):
+    """Send message to admins in Russian without waiting for delivery"""
+    # Send to all admins concurrently, one failed admin does not stop the rest
+    futures = broadcaster.broadcast(ADMIN_IDS, message_text, priority=PRIORITY_ADMIN, parse_mode='Markdown')
+    for admin_id, future in futures.items():
+        future.add_done_callback(lambda future, admin_id=admin_id: log_admin_delivery(admin_id, future.result()))
+
+def log_admin_delivery(admin_id, status):
+    if not status['ok']:
+        logger.error(f"Failed to send admin message to {admin_id}: {status['error']}")
+
+@metrics.timed(EXTERNAL_CALL_SECONDS, 'telegram.get_chat')
+def fetch_admin_name(admin_id):
+    """Get admin's username or full name"""
+    admin_info = bot.get_chat(admin_id)
+    return admin_info.username or f"{admin_info.first_name} {admin_info.last_name or ''}"
+
+# Admin display names, refreshed in background
+admin_profiles = ProfileCache(fetch_admin_name, ttl=int(os.getenv('ADMIN_PROFILE_TTL', '3600')))
+
+@metrics.timed(HANDLER_SECONDS, 'show_admin_list', '')
 def show_admin_list(message):
     """Show list of all admins"""
     try:
         admin_list = []
-        for admin_id in ADMIN_IDS:
-            try:
-                # Try to get admin's username or full name
-                admin_info = bot.get_chat(admin_id)
-                admin_name = admin_info.username or f"{admin_info.first_name} {admin_info.last_name or ''}"
-                admin_list.append(f"• {admin_name} (ID: `{admin_id}`)")
-            except Exception:
+        names = admin_profiles.get_many(sorted(ADMIN_IDS))
+        for admin_id, admin_name in names.items():
+            if admin_name:
+                admin_list.append(f"• {escape_markdown(admin_name)} (ID: `{admin_id}`)")
+            else:
                 admin_list.append(f"• ID: `{admin_id}`")
         
         response = "*Список администраторов:*\n\n" + "\n".join(admin_list)
-        bot.reply_to(message, response, parse_mode='Markdown')
+        outbox.reply_to(message, response, parse_mode='Markdown')
         
     except Exception as e:
         logger.error(f"Error showing admin list: {e}")
-        bot.reply_to(message, "Ошибка при получении списка администраторов.")
+        outbox.reply_to(message, "Ошибка при получении списка администраторов.")
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Investment application bot")
+    parser.add_argument('--mode', choices=['polling', 'webhook'], default=os.getenv('BOT_MODE', 'polling'))
+    parser.add_argument('--webhook-url', default=os.getenv('WEBHOOK_URL'),
+                        help="Public URL Telegram should post updates to")
+    parser.add_argument('--host', default=os.getenv('WEBHOOK_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('WEBHOOK_PORT', '8443')))
+    return parser.parse_args()
+
+def run_webhook(args):
+    """Serve updates over webhook"""
+    from urllib.parse import urlparse
+    from webhook import WebhookServer
+
+    secret_token = os.getenv('WEBHOOK_SECRET')
+    if args.webhook_url:
+        bot.remove_webhook()
+        bot.set_webhook(url=args.webhook_url, secret_token=secret_token)
+        logger.info(f"Webhook set to {args.webhook_url}")
+    path = urlparse(args.webhook_url).path if args.webhook_url else '/webhook'
+    WebhookServer(bot, path or '/webhook', secret_token).run(args.host, args.port)
 
 if __name__ == '__main__':
-    logger.info("Bot started")
-    bot.polling(none_stop=True) 
\ No newline at end of file
+    args = parse_args()
+    if coordination and args.mode != 'webhook':
+        # Telegram rejects concurrent getUpdates calls of one bot
+        raise SystemExit("COORDINATION needs --mode webhook, several processes cannot poll one bot")
+    logger.info(f"Bot started in {args.mode} mode")
+    accepting_updates.set()
+    try:
+        if args.mode == 'webhook':
+            run_webhook(args)
+        else:
+            bot.polling(none_stop=True)
+    finally:
+        bot.update_pool.stop()
+        admin_profiles.stop()
+        outbox.stop()
+        if write_queue:
+            write_queue.stop()
+        if sheets:
+            sheets.stop()
+        if leader_lease:
+            leader_lease.stop()
+            mirror_sync.stop()
+        if node_lease:
+            node_lease.stop()
+        if coordination:
+            coordination.close()
+        if health_server:
+            health_server.stop()
+        bot.processed_updates.close()
+        id_generator.close()
+        sessions.close()
+        storage.close() 
\ No newline at end of file
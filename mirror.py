@@ -0,0 +1,72 @@
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SheetsMirrorSync:
+    """Copy changed applications from primary storage to the sheet
+
+    Used when several bot processes share storage: only the process
+    holding the leader lease runs the sync, so the sheet has one writer.
+    """
+
+    def __init__(self, storage, excel_service_factory, interval=5, batch_size=100, max_delay=300):
+        self.storage = storage
+        self.excel_service_factory = excel_service_factory
+        self.excel_service = None
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._active = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sheets-mirror', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def activate(self):
+        """Start syncing, called when this process becomes leader"""
+        self._active.set()
+
+    def deactivate(self):
+        """Pause syncing, called when leadership is lost"""
+        self._active.clear()
+
+    def sync_once(self):
+        """Mirror one batch, return (mirrored, failed) counts"""
+        if self.excel_service is None:
+            self.excel_service = self.excel_service_factory()
+        records = self.storage.pending_mirror(self.batch_size)
+        if not records:
+            return 0, 0
+        results = self.excel_service.save_batch(records)
+        mirrored = [
+            (record['investment_id'], record['version'])
+            for record in records
+            if results.get(record['investment_id'])
+        ]
+        self.storage.mark_mirrored(mirrored)
+        return len(mirrored), len(records) - len(mirrored)
+
+    def _run(self):
+        delay = self.interval
+        while not self._stop_event.is_set():
+            if not self._active.wait(1):
+                continue
+            try:
+                mirrored, failed = self.sync_once()
+                if failed:
+                    raise RuntimeError(f"{failed} records failed")
+                delay = self.interval
+                if mirrored == self.batch_size:
+                    # More records are waiting
+                    continue
+            except Exception as e:
+                delay = min(delay * 2, self.max_delay)
+                logger.error(f"Error mirroring to sheet, retrying in {delay}s: {e}")
+            self._stop_event.wait(delay)
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(10)
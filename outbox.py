@@ -0,0 +1,267 @@
+import heapq
+import itertools
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import Future
+import requests
+from telebot.apihelper import ApiTelegramException
+from rate_limit import TokenBucket
+from metrics import EXTERNAL_CALL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Lower value is sent first
+PRIORITY_ADMIN = 0
+PRIORITY_REPLY = 1
+PRIORITY_BROADCAST = 2
+
+# Telegram message length limit
+MAX_TEXT_LENGTH = 4096
+
+class OutboundMessage:
+    """Message or other chat request waiting to be sent
+
+    method is the bot method to call. For send_message the text is sent
+    to chat_id, other methods are called with kwargs only.
+    """
+
+    def __init__(self, chat_id, text, kwargs, priority, seq, method='send_message'):
+        self.chat_id = chat_id
+        self.text = text
+        self.kwargs = kwargs
+        self.method = method
+        self.priority = priority
+        self.seq = seq
+        self.future = Future()
+        self.attempts = 0
+        # Set after a merged send failed, the message is then sent on its own
+        self.single = False
+
+
+class MessageDispatcher:
+    """Send all outgoing messages through rate-limited worker threads
+
+    Messages of one chat are sent in order. Chats are served by priority,
+    so admin notifications go ahead of user prompts. Consecutive plain
+    messages queued for the same chat are grouped into one request.
+    A chat that is rate limited or waiting to retry is put aside until
+    its delay has passed, so workers keep serving other chats. Message
+    edits and callback query answers share the queue of their chat.
+    """
+
+    def __init__(self, bot, workers=4, global_rate=30, per_chat_rate=1, per_chat_burst=3, max_retries=3):
+        self.bot = bot
+        self.max_retries = max_retries
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.global_bucket = TokenBucket(global_rate)
+        self._chat_buckets = {}
+
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        # chat_id -> deque of OutboundMessage
+        self._queues = {}
+        # Heap of (priority, seq, chat_id) for chats with queued messages
+        self._ready = []
+        # Heap of (not_before, priority, seq, chat_id) for chats put aside
+        self._delayed = []
+        self._in_flight = set()
+        self._stopping = False
+
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._run, name=f'outbox-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def send_message(self, chat_id, text, priority=PRIORITY_REPLY, **kwargs):
+        """Queue message, return Future with delivery status
+
+        Status is a dict with 'ok', 'attempts', 'error' and 'message_id'
+        keys. Merged messages share the ID of the message that was sent.
+        """
+        return self._queue(chat_id, text, kwargs, priority)
+
+    def edit_message_text(self, chat_id, message_id, text, priority=PRIORITY_REPLY, **kwargs):
+        """Queue edit of a sent message, return Future with delivery status"""
+        kwargs.update(text=text, chat_id=chat_id, message_id=message_id)
+        return self._queue(chat_id, None, kwargs, priority, 'edit_message_text')
+
+    def answer_callback_query(self, chat_id, callback_query_id, text=None, priority=PRIORITY_REPLY, **kwargs):
+        """Queue answer to a button press in chat_id, return Future with delivery status"""
+        kwargs.update(callback_query_id=callback_query_id, text=text)
+        return self._queue(chat_id, None, kwargs, priority, 'answer_callback_query')
+
+    def _queue(self, chat_id, text, kwargs, priority, method='send_message'):
+        """Add request to the chat's queue"""
+        with self._cond:
+            message = OutboundMessage(chat_id, text, kwargs, priority, next(self._seq), method)
+            self._queues.setdefault(chat_id, deque()).append(message)
+            if chat_id not in self._in_flight:
+                heapq.heappush(self._ready, (priority, message.seq, chat_id))
+                self._cond.notify()
+        return message.future
+
+    def reply_to(self, message, text, priority=PRIORITY_REPLY, **kwargs):
+        """Queue reply to a received message"""
+        return self.send_message(
+            message.chat.id, text, priority=priority, reply_to_message_id=message.message_id, **kwargs
+        )
+
+    def queue_depth(self):
+        """Number of messages waiting to be sent"""
+        with self._cond:
+            return sum(len(pending) for pending in self._queues.values())
+
+    def _mergeable(self, first, second):
+        """Check if two consecutive messages can be sent as one
+
+        Formatted messages are never merged, one bad entity would fail all
+        of them. Only the last message may have a keyboard.
+        """
+        if first.single or second.single:
+            return False
+        if first.method != 'send_message' or second.method != 'send_message':
+            return False
+        if first.kwargs or set(second.kwargs) - {'reply_markup'}:
+            return False
+        return len(first.text) + len(second.text) + 2 <= MAX_TEXT_LENGTH
+
+    def _next_batch(self):
+        """Take messages of the most urgent idle chat"""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, priority, seq, chat_id = heapq.heappop(self._delayed)
+                    self._in_flight.discard(chat_id)
+                    heapq.heappush(self._ready, (priority, seq, chat_id))
+                if not self._ready:
+                    if self._stopping and not self._delayed:
+                        return None, None
+                    self._cond.wait(self._delayed[0][0] - now if self._delayed else None)
+                    continue
+                _, _, chat_id = heapq.heappop(self._ready)
+                pending = self._queues.get(chat_id)
+                # Stale heap entry, chat is already being served
+                if chat_id in self._in_flight or not pending:
+                    continue
+                batch = [pending.popleft()]
+                while pending and self._mergeable(batch[-1], pending[0]):
+                    batch.append(pending.popleft())
+                self._in_flight.add(chat_id)
+                return chat_id, batch
+
+    def _finish(self, chat_id):
+        """Release chat and reschedule its remaining messages"""
+        with self._cond:
+            self._in_flight.discard(chat_id)
+            pending = self._queues.get(chat_id)
+            if pending:
+                heapq.heappush(self._ready, (pending[0].priority, pending[0].seq, chat_id))
+                self._cond.notify()
+            else:
+                self._queues.pop(chat_id, None)
+
+    def _retry_later(self, chat_id, batch, delay):
+        """Put batch back in front of the chat's queue and set chat aside for delay seconds"""
+        with self._cond:
+            self._queues.setdefault(chat_id, deque()).extendleft(reversed(batch))
+            # Chat stays in flight until the delay has passed
+            heapq.heappush(self._delayed, (time.monotonic() + delay, batch[0].priority, batch[0].seq, chat_id))
+            self._cond.notify()
+
+    def _complete(self, chat_id, batch, ok, message_id, error):
+        """Release chat and resolve futures of batch"""
+        self._finish(chat_id)
+        for message in batch:
+            message.future.set_result({
+                'ok': ok, 'attempts': message.attempts,
+                'error': error, 'message_id': message_id
+            })
+
+    def _run(self):
+        """Send queued messages"""
+        while True:
+            chat_id, batch = self._next_batch()
+            if batch is None:
+                return
+            wait = self._chat_bucket(chat_id).try_acquire()
+            if wait:
+                self._retry_later(chat_id, batch, wait)
+                continue
+            self.global_bucket.acquire()
+
+            for message in batch:
+                message.attempts += 1
+            try:
+                result, error, retry_after = self._deliver(chat_id, batch)
+            except Exception as e:
+                logger.error(f"Error sending message to {chat_id}: {e}")
+                result, error, retry_after = None, str(e), None
+
+            if error is None:
+                self._complete(chat_id, batch, True, getattr(result, 'message_id', None), None)
+            elif retry_after is not None and batch[0].attempts <= self.max_retries:
+                self._retry_later(chat_id, batch, retry_after)
+            elif retry_after is None and len(batch) > 1:
+                # One bad message fails a merged send, send them one by one
+                for message in batch:
+                    message.single = True
+                self._retry_later(chat_id, batch, 0)
+            else:
+                logger.error(f"Failed to deliver {batch[0].method} to {chat_id}: {error}")
+                self._complete(chat_id, batch, False, None, error)
+
+    def _chat_bucket(self, chat_id):
+        """Get rate limiter of a chat"""
+        with self._cond:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                # Drop buckets of idle chats so memory stays bounded
+                if len(self._chat_buckets) > 10000:
+                    self._chat_buckets = {k: b for k, b in self._chat_buckets.items() if not b.is_full()}
+                bucket = self._chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, self.per_chat_burst)
+            return bucket
+
+    def _deliver(self, chat_id, batch):
+        """Send batch to one chat once
+
+        Returns (result, error, retry_after). result is what the bot method
+        returned, error is None on success. retry_after is the delay before
+        the next attempt for rate limit and server errors and None for
+        permanent errors.
+        """
+        method = batch[0].method
+        attempt = batch[0].attempts
+        try:
+            with EXTERNAL_CALL_SECONDS.time(f'telegram.{method}'):
+                if method == 'send_message':
+                    text = '\n\n'.join(message.text for message in batch)
+                    return self.bot.send_message(chat_id, text, **batch[-1].kwargs), None, None
+                return getattr(self.bot, method)(**batch[0].kwargs), None, None
+        except ApiTelegramException as e:
+            if method == 'edit_message_text' and 'message is not modified' in (e.description or ''):
+                # Message already shows the new text
+                return True, None, None
+            if e.error_code == 429:
+                # Telegram tells how long to wait
+                retry_after = (e.result_json or {}).get('parameters', {}).get('retry_after', 1)
+                logger.warning(f"Rate limited sending to {chat_id}, retrying in {retry_after}s")
+                return None, e.description, retry_after
+            if e.error_code >= 500:
+                return None, e.description, 2 ** attempt
+            # Blocked bot, chat not found and similar errors are permanent
+            return None, e.description, None
+        except requests.exceptions.RequestException as e:
+            return None, str(e), 2 ** attempt
+
+    def stop(self, timeout=10):
+        """Send remaining messages and stop workers"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
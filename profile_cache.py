@@ -0,0 +1,72 @@
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+class ProfileCache:
+    """TTL cache of display names fetched with fetch(user_id)
+
+    Stale entries are returned as they are and refreshed in the background.
+    Failed fetches are remembered for error_ttl seconds so an unreachable
+    chat is not asked for on every request.
+    """
+
+    def __init__(self, fetch, ttl=3600, error_ttl=60, max_workers=8):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self._lock = threading.Lock()
+        # user_id -> (name or None, expires_at)
+        self._entries = {}
+        # user_id -> Future of running refresh
+        self._refreshing = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='profiles')
+
+    def _refresh(self, user_id):
+        try:
+            name = self.fetch(user_id)
+            expires_at = time.monotonic() + self.ttl
+        except Exception as e:
+            logger.warning(f"Error fetching profile {user_id}: {e}")
+            with self._lock:
+                # Keep last known name
+                name = self._entries.get(user_id, (None, 0))[0]
+            expires_at = time.monotonic() + self.error_ttl
+        with self._lock:
+            self._entries[user_id] = (name, expires_at)
+            self._refreshing.pop(user_id, None)
+        return name
+
+    def get_many(self, user_ids, timeout=2):
+        """Return dict mapping user ID to name or None
+
+        Entries never fetched before are waited for up to timeout seconds,
+        stale ones are refreshed without waiting.
+        """
+        now = time.monotonic()
+        missing = []
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._entries.get(user_id)
+                if entry is not None and entry[1] > now:
+                    continue
+                future = self._refreshing.get(user_id)
+                if future is None:
+                    future = self._refreshing[user_id] = self._executor.submit(self._refresh, user_id)
+                if entry is None:
+                    missing.append(future)
+        if missing:
+            wait(missing, timeout=timeout)
+        with self._lock:
+            return {user_id: self._entries.get(user_id, (None, 0))[0] for user_id in user_ids}
+
+    def invalidate(self, user_id):
+        """Drop cached name"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stop(self):
+        """Stop refresh workers"""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,219 @@
+import json
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class SessionStore:
+    """Persistent user sessions with TTL eviction and LRU cache
+
+    Sessions in one of waiting_states are waiting on someone other than
+    the user, e.g. an admin, and never expire.
+    """
+
+    def __init__(self, path='bot.db', ttl=7 * 24 * 3600, cache_size=1000, eviction_interval=600, on_evict=None,
+                 waiting_states=()):
+        self.path = path
+        # Called with dict mapping state to number of evicted sessions
+        self.on_evict = on_evict
+        # Sessions not updated for ttl seconds are considered abandoned
+        self.ttl = ttl
+        self.waiting_states = tuple(waiting_states)
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    chat_id INTEGER PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)"
+            )
+            self._migrate_indexes()
+
+        self.evict_expired()
+        self._stop_event = threading.Event()
+        self._evictor = threading.Thread(
+            target=self._run_eviction, args=(eviction_interval,), name='session-eviction', daemon=True
+        )
+        self._evictor.start()
+        logger.info(f"Session store initialized at {path}")
+
+    def _migrate_indexes(self):
+        """Add investment ID and state columns used for secondary lookups"""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(sessions)")}
+        if 'investment_id' not in columns:
+            self.conn.execute("ALTER TABLE sessions ADD COLUMN investment_id TEXT")
+            self.conn.execute("ALTER TABLE sessions ADD COLUMN state TEXT")
+            self.conn.execute("""
+                UPDATE sessions SET
+                    investment_id = json_extract(data, '$.investment_id'),
+                    state = json_extract(data, '$.state')
+            """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_investment_id ON sessions (investment_id)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_state ON sessions (state, updated_at)"
+        )
+
+    def _live_clause(self):
+        """WHERE condition and parameters matching sessions that have not expired"""
+        params = [time.time() - self.ttl]
+        if not self.waiting_states:
+            return "updated_at >= ?", params
+        placeholders = ','.join('?' * len(self.waiting_states))
+        return f"(updated_at >= ? OR IFNULL(state, '') IN ({placeholders}))", params + list(self.waiting_states)
+
+    def _expired(self, session, updated_at):
+        return updated_at < time.time() - self.ttl and session.get('state') not in self.waiting_states
+
+    def _cache_put(self, chat_id, entry):
+        """Put (session, updated_at) into LRU cache"""
+        self._cache[chat_id] = entry
+        self._cache.move_to_end(chat_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get(self, chat_id, default=None):
+        """Return copy of session or default if missing or expired"""
+        with self._lock:
+            entry = self._cache.get(chat_id)
+            if entry is not None:
+                self._cache.move_to_end(chat_id)
+            else:
+                row = self.conn.execute(
+                    "SELECT data, updated_at FROM sessions WHERE chat_id = ?",
+                    (chat_id,)
+                ).fetchone()
+                if row is None:
+                    return default
+                entry = (json.loads(row[0]), row[1])
+                self._cache_put(chat_id, entry)
+
+        session, updated_at = entry
+        if self._expired(session, updated_at):
+            return default
+        return dict(session)
+
+    def save(self, chat_id, session):
+        """Store session and refresh its TTL"""
+        now = time.time()
+        with self._lock, self.conn:
+            # Index columns are written in the same statement as the data
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sessions (chat_id, data, updated_at, investment_id, state) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (chat_id, json.dumps(session), now, session.get('investment_id'), session.get('state'))
+            )
+            self._cache_put(chat_id, (dict(session), now))
+
+    def delete(self, chat_id):
+        """Remove session"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM sessions WHERE chat_id = ?", (chat_id,))
+            self._cache.pop(chat_id, None)
+
+    def __contains__(self, chat_id):
+        return self.get(chat_id) is not None
+
+    def list_by_state(self, state, limit=None, offset=0):
+        """Return list of (chat_id, session) in given state, oldest first"""
+        live, params = self._live_clause()
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT chat_id, data FROM sessions WHERE state = ? AND {live} "
+                "ORDER BY updated_at LIMIT ? OFFSET ?",
+                [state] + params + [-1 if limit is None else limit, offset]
+            ).fetchall()
+        return [(chat_id, json.loads(data)) for chat_id, data in rows]
+
+    def transition(self, investment_ids, from_state, to_state):
+        """Move sessions of investment IDs from one state to another in one transaction
+
+        Sessions not in from_state are skipped. Return list of (chat_id,
+        session) that were moved.
+        """
+        now = time.time()
+        investment_ids = list(investment_ids)
+        moved = []
+        live, params = self._live_clause()
+        with self._lock, self.conn:
+            rows = []
+            # Stay below SQLite's limit on query parameters
+            for start in range(0, len(investment_ids), 500):
+                chunk = investment_ids[start:start + 500]
+                rows.extend(self.conn.execute(
+                    f"SELECT chat_id, data FROM sessions WHERE investment_id IN ({','.join('?' * len(chunk))}) "
+                    f"AND state = ? AND {live}",
+                    chunk + [from_state] + params
+                ).fetchall())
+            for chat_id, data in rows:
+                session = json.loads(data)
+                session['state'] = to_state
+                # State guard keeps another process from moving the same session twice
+                cursor = self.conn.execute(
+                    "UPDATE sessions SET data = ?, state = ?, updated_at = ? WHERE chat_id = ? AND state = ?",
+                    (json.dumps(session), to_state, now, chat_id, from_state)
+                )
+                if cursor.rowcount:
+                    self._cache_put(chat_id, (dict(session), now))
+                    moved.append((chat_id, session))
+        return moved
+
+    def count_by_state(self, state):
+        """Return number of live sessions in given state"""
+        live, params = self._live_clause()
+        with self._lock:
+            return self.conn.execute(
+                f"SELECT COUNT(*) FROM sessions WHERE state = ? AND {live}", [state] + params
+            ).fetchone()[0]
+
+    def count_states(self):
+        """Return dict mapping state to number of live sessions"""
+        live, params = self._live_clause()
+        with self._lock:
+            return dict(self.conn.execute(
+                f"SELECT state, COUNT(*) FROM sessions WHERE {live} GROUP BY state", params
+            ).fetchall())
+
+    def evict_expired(self):
+        """Delete abandoned sessions, return number of evicted sessions"""
+        live, params = self._live_clause()
+        with self._lock, self.conn:
+            counts = dict(self.conn.execute(
+                f"SELECT state, COUNT(*) FROM sessions WHERE NOT {live} GROUP BY state", params
+            ).fetchall())
+            cursor = self.conn.execute(f"DELETE FROM sessions WHERE NOT {live}", params)
+            for chat_id in [k for k, entry in self._cache.items() if self._expired(*entry)]:
+                del self._cache[chat_id]
+        if cursor.rowcount:
+            logger.info(f"Evicted {cursor.rowcount} expired sessions")
+            if self.on_evict:
+                self.on_evict(counts)
+        return cursor.rowcount
+
+    def _run_eviction(self, interval):
+        """Periodically evict expired sessions"""
+        while not self._stop_event.wait(interval):
+            try:
+                self.evict_expired()
+            except Exception as e:
+                logger.error(f"Error evicting sessions: {e}")
+
+    def close(self):
+        """Stop eviction and close database connection"""
+        self._stop_event.set()
+        with self._lock:
+            self.conn.close()
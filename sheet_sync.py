@@ -0,0 +1,254 @@
+import sqlite3
+import threading
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# First data row, row 1 holds headers
+FIRST_ROW = 2
+
+def _checksum(ids):
+    return zlib.crc32('\n'.join(ids).encode('utf-8'))
+
+
+class SheetIndex:
+    """Persistent investment ID to row number index of the sheet
+
+    Rows are grouped in blocks of block_size rows, each with a checksum of
+    its IDs, so changes in the sheet are found by comparing blocks instead
+    of rereading the whole column.
+    """
+
+    def __init__(self, path='sheet_index.db', sheet_key=None, block_size=500):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS sheet_rows (
+                    row INTEGER PRIMARY KEY,
+                    investment_id TEXT NOT NULL
+                )
+            """)
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS sheet_rows_id ON sheet_rows (investment_id)"
+            )
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS sheet_blocks (
+                    block INTEGER PRIMARY KEY,
+                    checksum INTEGER NOT NULL
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS sheet_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+            # Index built for another sheet or block size is useless
+            identity = f"{sheet_key}:{block_size}"
+            row = self.conn.execute("SELECT value FROM sheet_meta WHERE key = 'identity'").fetchone()
+            if row is None or row[0] != identity:
+                self.conn.execute("DELETE FROM sheet_rows")
+                self.conn.execute("DELETE FROM sheet_blocks")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO sheet_meta (key, value) VALUES ('identity', ?)", (identity,)
+                )
+
+    def find(self, investment_id):
+        """Return row number of investment ID or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT MIN(row) FROM sheet_rows WHERE investment_id = ?", (investment_id,)
+            ).fetchone()
+        return row[0]
+
+    def __contains__(self, investment_id):
+        return self.find(investment_id) is not None
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM sheet_rows").fetchone()[0]
+
+    def last_row(self):
+        """Last row holding an ID, 1 if the sheet has only headers"""
+        with self._lock:
+            row = self.conn.execute("SELECT MAX(row) FROM sheet_rows").fetchone()
+        return row[0] or FIRST_ROW - 1
+
+    def block_of(self, row):
+        return (row - FIRST_ROW) // self.block_size
+
+    def block_range(self, block):
+        """First and last row of block"""
+        start = FIRST_ROW + block * self.block_size
+        return start, start + self.block_size - 1
+
+    def block_count(self):
+        return self.block_of(self.last_row()) + 1
+
+    def checksum(self, block):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT checksum FROM sheet_blocks WHERE block = ?", (block,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _block_ids(self, block):
+        start, end = self.block_range(block)
+        ids = [''] * self.block_size
+        for row, investment_id in self.conn.execute(
+            "SELECT row, investment_id FROM sheet_rows WHERE row BETWEEN ? AND ?", (start, end)
+        ):
+            ids[row - start] = investment_id
+        return ids
+
+    def replace_block(self, block, ids):
+        """Store IDs read from block, ids may be shorter than the block"""
+        ids = list(ids) + [''] * (self.block_size - len(ids))
+        start, end = self.block_range(block)
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM sheet_rows WHERE row BETWEEN ? AND ?", (start, end))
+            self.conn.executemany(
+                "INSERT INTO sheet_rows (row, investment_id) VALUES (?, ?)",
+                [(start + offset, investment_id) for offset, investment_id in enumerate(ids) if investment_id]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sheet_blocks (block, checksum) VALUES (?, ?)",
+                (block, _checksum(ids))
+            )
+
+    def truncate(self, last_row):
+        """Forget rows after last_row"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM sheet_rows WHERE row > ?", (last_row,))
+            self.conn.execute("DELETE FROM sheet_blocks WHERE block > ?", (self.block_of(last_row),))
+
+    def add_rows(self, rows):
+        """Record rows written by this process, rows maps investment ID to row number"""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sheet_rows (row, investment_id) VALUES (?, ?)",
+                [(row, investment_id) for investment_id, row in rows.items()]
+            )
+            for block in {self.block_of(row) for row in rows.values()}:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO sheet_blocks (block, checksum) VALUES (?, ?)",
+                    (block, _checksum(self._block_ids(block)))
+                )
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM sheet_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sheet_meta (key, value) VALUES (?, ?)", (key, str(value))
+            )
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class SheetSync:
+    """Keep SheetIndex in step with the sheet using A1 range reads
+
+    Each refresh reads the tail block to pick up rows appended by others,
+    one block in round-robin order to find manual edits, and the ID cells
+    of rows about to be updated. All of it is a single batch_get call, so
+    the cost does not grow with the sheet.
+    """
+
+    def __init__(self, sheet, index, verify_blocks=1):
+        self.sheet = sheet
+        self.index = index
+        self.verify_blocks = verify_blocks
+
+    def _column_range(self, block):
+        start, end = self.index.block_range(block)
+        return f'A{start}:A{end}'
+
+    def _read_blocks(self, blocks, extra_ranges=()):
+        """Read ID column of blocks and extra ranges in one call"""
+        ranges = [self._column_range(block) for block in blocks] + list(extra_ranges)
+        value_ranges = self.sheet.batch_get(ranges)
+        columns = [[row[0] if row else '' for row in values] for values in value_ranges]
+        return columns[:len(blocks)], columns[len(blocks):]
+
+    def _reconcile(self, block, ids):
+        """Store block if it differs from index, return True if it changed"""
+        padded = ids + [''] * (self.index.block_size - len(ids))
+        if _checksum(padded) == self.index.checksum(block):
+            return False
+        logger.info(f"Sheet rows {self._column_range(block)} changed, updating index")
+        self.index.replace_block(block, ids)
+        return True
+
+    def _sync_tail(self, block, ids):
+        """Reconcile tail block and read further blocks while they are full"""
+        pending = [(block, ids)]
+        ahead = 1
+        while True:
+            for block, ids in pending:
+                self._reconcile(block, ids)
+                if len(ids) < self.index.block_size:
+                    # Sheet ends in this block
+                    last_row = self.index.block_range(block)[0] + len(ids) - 1
+                    self.index.truncate(last_row)
+                    return
+            # Read ahead in growing steps when many rows were appended
+            ahead = min(ahead * 2, 64)
+            blocks = list(range(block + 1, block + 1 + ahead))
+            block_ids, _ = self._read_blocks(blocks)
+            pending = zip(blocks, block_ids)
+
+    def _next_verify_blocks(self, tail_block):
+        """Blocks before the tail block to verify, in round-robin order"""
+        if tail_block == 0:
+            return []
+        cursor = int(self.index.get_meta('verify_cursor', 0))
+        count = min(self.verify_blocks, tail_block)
+        blocks = [(cursor + i) % tail_block for i in range(count)]
+        self.index.set_meta('verify_cursor', (cursor + count) % tail_block)
+        return blocks
+
+    def refresh(self, expected=None):
+        """Bring index up to date
+
+        expected maps investment IDs to the row the caller is about to
+        write to. When a verified block or an expected row changed, rows
+        were probably inserted or deleted somewhere above, which shifts
+        every row below, so the whole index is verified once.
+        """
+        expected = expected or {}
+        tail_block = self.index.block_of(self.index.last_row() + 1)
+        blocks = [tail_block] + self._next_verify_blocks(tail_block)
+        cells = [f'A{row}' for row in expected.values()]
+        block_ids, cell_ids = self._read_blocks(blocks, cells)
+
+        changed = any([
+            self._reconcile(block, ids)
+            for block, ids in zip(blocks[1:], block_ids[1:])
+        ])
+        changed = changed or any(
+            (ids[0] if ids else '') != investment_id
+            for investment_id, ids in zip(expected, cell_ids)
+        )
+        if changed:
+            self.rescan()
+        else:
+            self._sync_tail(tail_block, block_ids[0])
+
+    def rescan(self):
+        """Verify every block, reading the ID column in one call"""
+        logger.warning("Verifying whole sheet index")
+        # One block past the last known row to see appended rows
+        blocks = list(range(self.index.block_count() + 1))
+        block_ids, _ = self._read_blocks(blocks)
+        for block, ids in zip(blocks[:-1], block_ids[:-1]):
+            self._reconcile(block, ids)
+        self._sync_tail(blocks[-1], block_ids[-1])
@@ -0,0 +1,97 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+class InvalidInput(Exception):
+    """Raised by validators to reject a message
+
+    key is the message key of the error reply, text a literal reply. With
+    neither set the message is ignored.
+    """
+
+    def __init__(self, key=None, text=None):
+        super().__init__(key or text)
+        self.key = key
+        self.text = text
+
+
+class Reply:
+    """What to answer the user with"""
+
+    def __init__(self, key=None, text=None, reply_markup=None):
+        self.key = key
+        self.text = text
+        self.reply_markup = reply_markup
+
+
+class Step:
+    """Conversation state definition
+
+    validator(text, session) returns the value to store in field or raises
+    InvalidInput. Then action(chat_id, session) runs and may return a
+    message key replacing prompt_key, or raise InvalidInput to keep the
+    session in its state. Otherwise the session moves to next_state (None
+    ends the conversation).
+    """
+
+    def __init__(self, next_state, prompt_key, validator=None, field=None, action=None, reply_markup=None):
+        self.next_state = next_state
+        self.prompt_key = prompt_key
+        self.validator = validator
+        self.field = field
+        self.action = action
+        self.reply_markup = reply_markup
+
+
+def checked(predicate, error_key):
+    """Build validator accepting text for which predicate(text) is true"""
+    def validator(text, session):
+        if not predicate(text):
+            raise InvalidInput(error_key)
+        return text
+    return validator
+
+
+class ConversationEngine:
+    """Dispatch messages through a table of conversation steps"""
+
+    def __init__(self, steps):
+        # state -> Step
+        self.steps = dict(steps)
+        self._hooks = []
+
+    def add_hook(self, hook):
+        """Register hook(chat_id, old_state, new_state, session) called on every transition"""
+        self._hooks.append(hook)
+
+    def handles(self, state):
+        """True if engine has a step for state"""
+        return state in self.steps
+
+    def handle(self, chat_id, session, text):
+        """Process message text, mutate session and return Reply or None"""
+        state = session.get('state')
+        step = self.steps.get(state)
+        if step is None:
+            return None
+
+        try:
+            value = step.validator(text, session) if step.validator else text
+        except InvalidInput as e:
+            if e.key is None and e.text is None:
+                return None
+            return Reply(e.key, e.text)
+
+        if step.field:
+            session[step.field] = value
+        prompt_key = step.prompt_key
+        if step.action:
+            try:
+                prompt_key = step.action(chat_id, session) or prompt_key
+            except InvalidInput as e:
+                return Reply(e.key, e.text)
+
+        session['state'] = step.next_state
+        for hook in self._hooks:
+            hook(chat_id, state, step.next_state, session)
+        return Reply(prompt_key, reply_markup=step.reply_markup)
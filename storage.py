@@ -0,0 +1,330 @@
+import datetime
+import sqlite3
+import threading
+import logging
+import metrics
+
+logger = logging.getLogger(__name__)
+
+def application_record(investment_id, telegram_id, full_name, investment_amount, email, tx_hash="", wallet_address="",
+                       language=None):
+    """Build record dict for save_batch"""
+    record = {
+        'investment_id': investment_id,
+        'telegram_id': telegram_id,
+        'full_name': full_name,
+        'investment_amount': investment_amount,
+        'email': email,
+        'tx_hash': tx_hash,
+        'wallet_address': wallet_address
+    }
+    if language:
+        record['language'] = language
+    return record
+
+class StorageBackend:
+    """Base class for application storage backends
+
+    Records are dicts with investment_id, telegram_id, full_name,
+    investment_amount, email, tx_hash and wallet_address keys and an
+    optional language. Saving a record with tx_hash or wallet_address
+    updates the existing application.
+    """
+
+    def save_batch(self, records):
+        """Save or update records, return dict mapping investment ID to success flag"""
+        raise NotImplementedError
+
+    def get_application(self, investment_id):
+        """Return application record by investment ID or None"""
+        raise NotImplementedError
+
+    @metrics.timed(metrics.EXTERNAL_CALL_SECONDS, 'save_user_data')
+    def save_user_data(self, investment_id, telegram_id, full_name, investment_amount, email, tx_hash="", wallet_address="",
+                       language=None):
+        """Save or update user data"""
+        record = application_record(
+            investment_id, telegram_id, full_name, investment_amount, email, tx_hash, wallet_address, language
+        )
+        results = self.save_batch([record])
+        return results[investment_id]
+
+
+class SQLiteStorage(StorageBackend):
+    """Local SQLite storage in WAL mode"""
+
+    def __init__(self, path='bot.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS applications (
+                    investment_id TEXT PRIMARY KEY,
+                    created_at TEXT NOT NULL,
+                    telegram_id INTEGER,
+                    full_name TEXT,
+                    investment_amount REAL,
+                    email TEXT,
+                    tx_hash TEXT NOT NULL DEFAULT '',
+                    wallet_address TEXT NOT NULL DEFAULT ''
+                )
+            """)
+            # Idempotency keys of application steps
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS application_steps (
+                    investment_id TEXT NOT NULL,
+                    step TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (investment_id, step)
+                )
+            """)
+            self._migrate()
+        logger.info(f"SQLite storage initialized at {path}")
+
+    def _migrate(self):
+        """Add columns added after the first release"""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(applications)")}
+        if 'version' not in columns:
+            self.conn.execute("ALTER TABLE applications ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+            self.conn.execute("ALTER TABLE applications ADD COLUMN mirrored_version INTEGER NOT NULL DEFAULT 0")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS applications_unmirrored ON applications (mirrored_version, version)"
+        )
+        # Language is stored for reports
+        if 'language' not in columns:
+            self.conn.execute("ALTER TABLE applications ADD COLUMN language TEXT")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS applications_created_at ON applications (created_at)"
+        )
+
+    # Existing applications only get non-empty tx hash and wallet updated
+    UPSERT_SQL = """
+        INSERT INTO applications
+            (investment_id, created_at, telegram_id, full_name,
+             investment_amount, email, tx_hash, wallet_address, language)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (investment_id) DO UPDATE SET
+            tx_hash = CASE WHEN excluded.tx_hash != '' THEN excluded.tx_hash ELSE tx_hash END,
+            wallet_address = CASE WHEN excluded.wallet_address != '' THEN excluded.wallet_address ELSE wallet_address END,
+            language = COALESCE(excluded.language, language),
+            version = version + 1
+    """
+
+    @staticmethod
+    def _row(record, now):
+        return (
+            record['investment_id'],
+            now,
+            record['telegram_id'],
+            record['full_name'],
+            record['investment_amount'],
+            record['email'],
+            record.get('tx_hash', ''),
+            record.get('wallet_address', ''),
+            record.get('language')
+        )
+
+    def save_batch(self, records):
+        """Save or update records in one transaction"""
+        now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [self._row(record, now) for record in records]
+        try:
+            with self._lock, self.conn:
+                self.conn.executemany(self.UPSERT_SQL, rows)
+            logger.info(f"Saved {len(rows)} records to SQLite")
+            return {record['investment_id']: True for record in records}
+        except Exception as e:
+            logger.error(f"Error saving to SQLite: {e}")
+            return {record['investment_id']: False for record in records}
+
+    def get_application(self, investment_id):
+        """Return application record by investment ID or None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM applications WHERE investment_id = ?",
+                (investment_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    @metrics.timed(metrics.EXTERNAL_CALL_SECONDS, 'save_step')
+    def save_step(self, record, step):
+        """Save record as step of its application at most once
+
+        The step is claimed in the same transaction as the save, so a
+        repeated step writes nothing. Return True if saved, None if the step
+        was saved before and False on error.
+        """
+        now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            with self._lock, self.conn:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO application_steps (investment_id, step, created_at) VALUES (?, ?, ?)",
+                    (record['investment_id'], step, now)
+                )
+                if cursor.rowcount == 0:
+                    return None
+                self.conn.execute(self.UPSERT_SQL, self._row(record, now))
+            logger.info(f"Saved step {step} of {record['investment_id']} to SQLite")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving step {step} of {record['investment_id']} to SQLite: {e}")
+            return False
+
+    def pending_mirror(self, limit=100):
+        """Return records changed since they were last mirrored, with their version"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM applications WHERE mirrored_version < version ORDER BY rowid LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def mark_mirrored(self, versions):
+        """Record mirrored versions, versions is a list of (investment_id, version)"""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE applications SET mirrored_version = ? "
+                "WHERE investment_id = ? AND mirrored_version < ?",
+                [(version, investment_id, version) for investment_id, version in versions]
+            )
+
+    STATUS_SQL = "CASE WHEN tx_hash != '' THEN 'completed' ELSE 'submitted' END"
+
+    def _filter_clause(self, created_from=None, created_before=None, status=None, language=None,
+                       min_amount=None, max_amount=None):
+        """Build WHERE conditions and parameters for application filters"""
+        conditions = []
+        params = []
+        for condition, value in (
+            ("created_at >= ?", created_from),
+            ("created_at < ?", created_before),
+            (f"{self.STATUS_SQL} = ?", status),
+            ("language = ?", language),
+            ("investment_amount >= ?", min_amount),
+            ("investment_amount <= ?", max_amount),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        return conditions, params
+
+    def list_applications(self, after=0, limit=500, **filters):
+        """Return page of applications with rowid greater than after, oldest first
+
+        Records have extra rowid and status keys. Pass the last rowid as
+        after to get the next page.
+        """
+        conditions, params = self._filter_clause(**filters)
+        conditions.insert(0, "rowid > ?")
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT rowid, *, {self.STATUS_SQL} AS status FROM applications "
+                f"WHERE {' AND '.join(conditions)} ORDER BY rowid LIMIT ?",
+                [after] + params + [limit]
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def summarize(self, **filters):
+        """Return count and amount totals per status for filtered applications"""
+        conditions, params = self._filter_clause(**filters)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {self.STATUS_SQL} AS status, COUNT(*), COALESCE(SUM(investment_amount), 0) "
+                f"FROM applications {where} GROUP BY status",
+                params
+            ).fetchall()
+        by_status = {status: {'count': count, 'amount': amount} for status, count, amount in rows}
+        return {
+            'count': sum(item['count'] for item in by_status.values()),
+            'amount': sum(item['amount'] for item in by_status.values()),
+            'by_status': by_status
+        }
+
+    def close(self):
+        """Close database connection"""
+        with self._lock:
+            self.conn.close()
+
+
+class LazyStorage(StorageBackend):
+    """Storage backend created in the background
+
+    factory() runs in a thread, retried with backoff, so a slow or
+    unreachable backend does not block startup. Until it is ready
+    save_batch waits up to ready_timeout seconds and then reports every
+    record as not saved, which keeps them queued by the caller.
+    """
+
+    def __init__(self, factory, name='storage', retry_delay=5, max_delay=300, ready_timeout=10):
+        self.factory = factory
+        self.name = name
+        self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self.ready_timeout = ready_timeout
+        self.backend = None
+        self.state = 'idle'
+        self.error = None
+        self.attempts = 0
+        self._ready = threading.Event()
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start creating backend, return self"""
+        with self._lock:
+            if self._thread is None:
+                self.state = 'starting'
+                self._thread = threading.Thread(target=self._run, name=f'{self.name}-start', daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        delay = self.retry_delay
+        while not self._stop_event.is_set():
+            self.attempts += 1
+            try:
+                self.backend = self.factory()
+                self.state = 'ready'
+                self.error = None
+                self._ready.set()
+                logger.info(f"{self.name} is ready after {self.attempts} attempts")
+                return
+            except Exception as e:
+                self.state = 'failed'
+                self.error = str(e)
+                logger.error(f"Error starting {self.name}, retrying in {delay}s: {e}")
+            self._stop_event.wait(delay)
+            delay = min(delay * 2, self.max_delay)
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout=None):
+        """Wait for backend, return True if it is ready"""
+        return self._ready.wait(timeout)
+
+    def status(self):
+        """Dict with state, error and attempts"""
+        return {'state': self.state, 'error': self.error, 'attempts': self.attempts}
+
+    def save_batch(self, records):
+        if not self.wait_ready(self.ready_timeout):
+            logger.warning(f"{self.name} is not ready, keeping {len(records)} records queued")
+            return {record['investment_id']: False for record in records}
+        return self.backend.save_batch(records)
+
+    def get_application(self, investment_id):
+        if not self.ready:
+            return None
+        return self.backend.get_application(investment_id)
+
+    def stop(self):
+        """Stop retrying to create backend"""
+        self._stop_event.set()
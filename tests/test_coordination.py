@@ -0,0 +1,176 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from coordination import SQLiteCoordination, Lease, KeyLock, allocate_node_id
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Child process incrementing a shared counter under the chat lock
+INCREMENT_SCRIPT = """
+import sys, time
+from coordination import SQLiteCoordination, KeyLock
+backend = SQLiteCoordination(sys.argv[1])
+lock = KeyLock(backend, 'chat:', sys.argv[2], poll_interval=0.001)
+for _ in range(int(sys.argv[3])):
+    with lock.hold(5):
+        # Read-modify-write like a session update
+        value = backend.get('counter') or 0
+        time.sleep(0.001)
+        backend.set('counter', value + 1)
+backend.close()
+"""
+
+# Child process holding the chat lock until stdin is closed
+HOLD_SCRIPT = """
+import sys
+from coordination import SQLiteCoordination, KeyLock
+backend = SQLiteCoordination(sys.argv[1])
+with KeyLock(backend, 'chat:', 'child').hold(5):
+    print('locked', flush=True)
+    sys.stdin.read()
+backend.close()
+"""
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'bot.db')
+
+
+@pytest.fixture
+def backends(path):
+    """Two connections to one database, as two bot processes have"""
+    first, second = SQLiteCoordination(path), SQLiteCoordination(path)
+    yield first, second
+    first.close()
+    second.close()
+
+
+def run_child(script, *args, **kwargs):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.Popen([sys.executable, '-c', script, *args], env=env, **kwargs)
+
+
+def test_lease_is_exclusive_until_released(backends):
+    first, second = backends
+    assert first.acquire('sheets-leader', 'a', ttl=10)
+    assert not second.acquire('sheets-leader', 'b', ttl=10)
+    # Owner renews its own lease
+    assert first.acquire('sheets-leader', 'a', ttl=10)
+    second.release('sheets-leader', 'b')
+    assert not second.acquire('sheets-leader', 'b', ttl=10)
+    first.release('sheets-leader', 'a')
+    assert second.acquire('sheets-leader', 'b', ttl=10)
+
+
+def test_expired_lease_is_taken_over(backends):
+    first, second = backends
+    assert first.acquire('sheets-leader', 'a', ttl=0.05)
+    time.sleep(0.1)
+    assert second.acquire('sheets-leader', 'b', ttl=10)
+    assert not first.acquire('sheets-leader', 'a', ttl=10)
+
+
+def test_lease_callbacks_follow_ownership(backends):
+    first, second = backends
+    events = []
+    lease = Lease(first, 'node:0', 'a', ttl=10,
+                  on_acquired=lambda: events.append('acquired'), on_lost=lambda: events.append('lost'))
+    assert lease.try_acquire()
+    # Another process took the lease after it expired
+    second.set('node:0', 'b', ttl=10)
+    assert not lease.try_acquire()
+    second.delete('node:0')
+    assert lease.try_acquire()
+    assert events == ['acquired', 'lost', 'acquired']
+    lease.stop()
+    assert second.acquire('node:0', 'b', ttl=10)
+
+
+def test_processes_get_distinct_node_ids(backends):
+    first, second = backends
+    first_id, first_lease = allocate_node_id(first, 'a', 4)
+    second_id, second_lease = allocate_node_id(second, 'b', 4)
+    try:
+        assert first_id != second_id
+    finally:
+        first_lease.stop()
+        second_lease.stop()
+
+
+def test_key_lock_excludes_other_connection(backends):
+    first, second = backends
+    order = []
+
+    def other():
+        with KeyLock(second, 'chat:', 'b').hold(5):
+            order.append('b')
+
+    with KeyLock(first, 'chat:', 'a').hold(5):
+        thread = threading.Thread(target=other)
+        thread.start()
+        time.sleep(0.2)
+        order.append('a done')
+    thread.join(5)
+    assert order == ['a done', 'b']
+
+
+def test_key_lock_times_out(backends):
+    first, second = backends
+    with KeyLock(first, 'chat:', 'a').hold(5):
+        with pytest.raises(TimeoutError):
+            with KeyLock(second, 'chat:', 'b', timeout=0.1).hold(5):
+                pass
+        # Other keys are not affected
+        with KeyLock(second, 'chat:', 'b', timeout=0.1).hold(6):
+            pass
+
+
+def test_lock_of_dead_holder_expires(backends):
+    first, second = backends
+    assert first.acquire('chat:5', 'a', ttl=0.1)
+    with KeyLock(second, 'chat:', 'b', timeout=1).hold(5):
+        pass
+
+
+def test_expired_keys_are_purged(backends):
+    first, _ = backends
+    first.set('admin_state:1', 'waiting_for_id', ttl=0.05)
+    first.set('admin_state:2', 'waiting_for_id', ttl=60)
+    first.set('permanent', 1)
+    time.sleep(0.1)
+    assert first.purge_expired() == 1
+    count = first.conn.execute("SELECT COUNT(*) FROM coordination").fetchone()[0]
+    assert count == 2
+
+
+def test_key_lock_blocks_another_process(path):
+    child = run_child(HOLD_SCRIPT, path, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    backend = SQLiteCoordination(path)
+    try:
+        assert child.stdout.readline().strip() == 'locked'
+        with pytest.raises(TimeoutError):
+            with KeyLock(backend, 'chat:', 'parent', timeout=0.2).hold(5):
+                pass
+        child.stdin.close()
+        assert child.wait(10) == 0
+        with KeyLock(backend, 'chat:', 'parent', timeout=1).hold(5):
+            pass
+    finally:
+        child.kill()
+        backend.close()
+
+
+def test_two_processes_do_not_lose_updates(path):
+    children = [run_child(INCREMENT_SCRIPT, path, f'process-{i}', '50') for i in range(2)]
+    assert [child.wait(60) for child in children] == [0, 0]
+    backend = SQLiteCoordination(path)
+    try:
+        assert backend.get('counter') == 100
+    finally:
+        backend.close()
@@ -0,0 +1,62 @@
+import sqlite3
+
+import pytest
+from telebot import types
+
+from dedup import ProcessedUpdates
+from dispatch import PooledTeleBot
+
+
+def message_update(update_id, chat_id=1, text='hi'):
+    return types.Update.de_json({'update_id': update_id, 'message': {
+        'message_id': update_id, 'date': 0, 'text': text,
+        'chat': {'id': chat_id, 'type': 'private'},
+        'from': {'id': chat_id, 'is_bot': False, 'first_name': 'x'}
+    }})
+
+
+@pytest.fixture
+def bot(tmp_path):
+    bot = PooledTeleBot('123:test', pool_size=1, processed_updates=ProcessedUpdates(str(tmp_path / 'bot.db')))
+    yield bot
+    bot.update_pool.stop()
+    bot.processed_updates.close()
+
+
+def test_redelivered_update_is_handled_once(bot):
+    handled = []
+    bot.register_message_handler(lambda message: handled.append(message.text))
+
+    bot._process_update(message_update(1))
+    bot._process_update(message_update(1))
+    assert handled == ['hi']
+
+
+def test_transient_failure_releases_claim(bot):
+    handled = []
+    failures = [sqlite3.OperationalError('database is locked')]
+
+    def handler(message):
+        if failures:
+            raise failures.pop()
+        handled.append(message.text)
+
+    bot.register_message_handler(handler)
+    with pytest.raises(sqlite3.OperationalError):
+        bot._process_update(message_update(1))
+    bot._process_update(message_update(1))
+    assert handled == ['hi']
+
+
+def test_other_failure_keeps_claim(bot):
+    calls = []
+
+    def handler(message):
+        calls.append(message.text)
+        raise ValueError('bug')
+
+    bot.register_message_handler(handler)
+    with pytest.raises(ValueError):
+        bot._process_update(message_update(1))
+    bot._process_update(message_update(1))
+    assert calls == ['hi']
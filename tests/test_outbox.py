@@ -0,0 +1,134 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from telebot.apihelper import ApiTelegramException
+
+from outbox import MessageDispatcher
+
+
+def api_error(code, description, retry_after=None):
+    result_json = {'ok': False, 'error_code': code, 'description': description}
+    if retry_after is not None:
+        result_json['parameters'] = {'retry_after': retry_after}
+    return ApiTelegramException('sendMessage', None, result_json)
+
+
+class FakeBot:
+    """Records sent messages, fail(chat_id, text) returns an exception to raise or None"""
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send_message(self, chat_id, text, **kwargs):
+        error = self.fail(chat_id, text) if self.fail else None
+        if error:
+            raise error
+        with self._lock:
+            self.sent.append((chat_id, text, kwargs))
+            return SimpleNamespace(message_id=len(self.sent))
+
+    def edit_message_text(self, text, chat_id, message_id, **kwargs):
+        with self._lock:
+            self.sent.append((chat_id, 'edit', message_id, text))
+        if text == 'same':
+            raise api_error(400, 'Bad Request: message is not modified')
+        return True
+
+    def answer_callback_query(self, callback_query_id, text=None, **kwargs):
+        with self._lock:
+            self.sent.append((None, 'answer', callback_query_id, text))
+        return True
+
+
+def dispatcher(bot, **kwargs):
+    kwargs.setdefault('global_rate', 1000)
+    kwargs.setdefault('per_chat_rate', 1000)
+    return MessageDispatcher(bot, **kwargs)
+
+
+def test_rate_limited_chat_does_not_block_other_chats():
+    bot = FakeBot(fail=lambda chat_id, text: api_error(429, 'Too Many Requests', 2) if chat_id == 1 else None)
+    outbox = dispatcher(bot, workers=1)
+    try:
+        outbox.send_message(1, 'throttled')
+        start = time.monotonic()
+        status = outbox.send_message(2, 'other chat').result(timeout=1)
+        assert status['ok']
+        assert time.monotonic() - start < 1
+    finally:
+        bot.fail = None
+        outbox.stop()
+
+
+def test_server_errors_are_retried():
+    failures = [api_error(502, 'Bad Gateway')]
+    bot = FakeBot(fail=lambda chat_id, text: failures.pop() if failures else None)
+    outbox = dispatcher(bot)
+    try:
+        status = outbox.send_message(1, 'hello').result(timeout=5)
+        assert status['ok']
+        assert status['attempts'] == 2
+    finally:
+        outbox.stop()
+
+
+def test_formatted_messages_are_not_merged():
+    bot = FakeBot(fail=lambda chat_id, text: api_error(400, "Can't parse entities") if '_' in text else None)
+    outbox = dispatcher(bot, workers=1)
+    try:
+        # Hold the worker so all messages are queued before the first send
+        gate = threading.Event()
+        bot_send = bot.send_message
+        bot.send_message = lambda chat_id, text, **kwargs: (gate.wait(), bot_send(chat_id, text, **kwargs))[1]
+        outbox.send_message(9, 'gate')
+        futures = [
+            outbox.send_message(1, text, parse_mode='Markdown')
+            for text in ['*one*', 'john_doe@x.com', '*three*']
+        ]
+        gate.set()
+        statuses = [future.result(timeout=5) for future in futures]
+        assert [status['ok'] for status in statuses] == [True, False, True]
+    finally:
+        outbox.stop()
+
+
+def test_failed_merged_send_is_split():
+    bot = FakeBot(fail=lambda chat_id, text: api_error(400, 'Bad Request') if 'bad' in text else None)
+    outbox = dispatcher(bot, workers=1)
+    try:
+        gate = threading.Event()
+        bot_send = bot.send_message
+        bot.send_message = lambda chat_id, text, **kwargs: (gate.wait(), bot_send(chat_id, text, **kwargs))[1]
+        outbox.send_message(9, 'gate')
+        futures = [outbox.send_message(1, text) for text in ['first', 'bad', 'third']]
+        gate.set()
+        statuses = [future.result(timeout=5) for future in futures]
+        assert [status['ok'] for status in statuses] == [True, False, True]
+        assert [text for chat_id, text, _ in bot.sent if chat_id == 1] == ['first', 'third']
+    finally:
+        outbox.stop()
+
+
+def test_edits_and_callback_answers_keep_chat_order():
+    bot = FakeBot()
+    outbox = dispatcher(bot, workers=1)
+    try:
+        gate = threading.Event()
+        bot_send = bot.send_message
+        bot.send_message = lambda chat_id, text, **kwargs: (gate.wait(), bot_send(chat_id, text, **kwargs))[1]
+        outbox.send_message(9, 'gate')
+        futures = [
+            outbox.answer_callback_query(1, 'query', 'done'),
+            outbox.send_message(1, 'notice'),
+            outbox.edit_message_text(1, 5, 'new view'),
+            outbox.edit_message_text(1, 5, 'same'),
+        ]
+        gate.set()
+        statuses = [future.result(timeout=5) for future in futures]
+        assert all(status['ok'] for status in statuses)
+        assert [entry[1] for entry in bot.sent if entry[0] != 9] == ['answer', 'notice', 'edit', 'edit']
+    finally:
+        outbox.stop()
@@ -0,0 +1,102 @@
+from state_machine import ConversationEngine, Step, InvalidInput, checked
+
+
+def amount(text, session):
+    try:
+        return float(text)
+    except ValueError:
+        raise InvalidInput('invalid_amount')
+
+
+def ignore_empty(text, session):
+    if not text:
+        raise InvalidInput()
+    return text
+
+
+def make_engine(action=None):
+    engine = ConversationEngine({
+        'entering_name': Step('entering_amount', 'enter_amount', validator=ignore_empty, field='full_name'),
+        'entering_amount': Step('entering_email', 'enter_email', validator=amount, field='investment_amount'),
+        'entering_email': Step(
+            None, 'success', validator=checked(lambda text: '@' in text, 'invalid_email'), field='email',
+            action=action
+        )
+    })
+    transitions = []
+    engine.add_hook(lambda chat_id, old, new, session: transitions.append((chat_id, old, new, dict(session))))
+    return engine, transitions
+
+
+def test_valid_input_moves_to_next_state_and_stores_field():
+    engine, transitions = make_engine()
+    session = {'state': 'entering_name'}
+    reply = engine.handle(1, session, 'John Smith')
+    assert reply.key == 'enter_amount'
+    assert session == {'state': 'entering_amount', 'full_name': 'John Smith'}
+    assert transitions == [(1, 'entering_name', 'entering_amount', session)]
+
+
+def test_full_conversation_ends_with_none_state():
+    engine, transitions = make_engine()
+    session = {'state': 'entering_name'}
+    for text in ['John Smith', '15000', 'john@example.com']:
+        reply = engine.handle(1, session, text)
+    assert reply.key == 'success'
+    assert session['state'] is None
+    assert session['investment_amount'] == 15000.0
+    assert [(old, new) for _, old, new, _ in transitions] == [
+        ('entering_name', 'entering_amount'),
+        ('entering_amount', 'entering_email'),
+        ('entering_email', None)
+    ]
+
+
+def test_invalid_input_keeps_state_and_replies_with_error():
+    engine, transitions = make_engine()
+    session = {'state': 'entering_amount'}
+    reply = engine.handle(1, session, 'a lot')
+    assert reply.key == 'invalid_amount'
+    assert session == {'state': 'entering_amount'}
+    assert transitions == []
+
+
+def test_invalid_input_without_reply_is_ignored():
+    engine, transitions = make_engine()
+    session = {'state': 'entering_name'}
+    assert engine.handle(1, session, '') is None
+    assert session == {'state': 'entering_name'}
+
+
+def test_unknown_state_is_not_handled():
+    engine, _ = make_engine()
+    assert not engine.handles('waiting_for_admin')
+    assert engine.handle(1, {'state': 'waiting_for_admin'}, 'hello') is None
+
+
+def test_action_runs_before_transition_and_can_replace_prompt():
+    seen = []
+
+    def action(chat_id, session):
+        seen.append(session['state'])
+        return 'custom'
+
+    engine, transitions = make_engine(action)
+    session = {'state': 'entering_email'}
+    reply = engine.handle(1, session, 'john@example.com')
+    assert reply.key == 'custom'
+    assert seen == ['entering_email']
+    assert session['state'] is None
+    assert len(transitions) == 1
+
+
+def test_failed_action_keeps_state():
+    def action(chat_id, session):
+        raise InvalidInput('record_error')
+
+    engine, transitions = make_engine(action)
+    session = {'state': 'entering_email'}
+    reply = engine.handle(1, session, 'john@example.com')
+    assert reply.key == 'record_error'
+    assert session['state'] == 'entering_email'
+    assert transitions == []
@@ -0,0 +1,29 @@
+from validators import validate_columns, validate_name
+
+
+def test_batch_name_check_uses_record_language():
+    results = validate_columns({
+        'full_name': ['王小明', '王小明', 'John Smith'],
+        'language': ['zh', 'en', None]
+    })
+    assert [result['valid'] for result in results] == [True, False, True]
+    assert results[1]['errors'] == {'full_name': 'invalid_name'}
+
+
+def test_batch_matches_single_value_validators():
+    names = ['王小明', 'John Smith', 'J', "Anne-Marie O'Neil"]
+    for language in ('en', 'zh'):
+        results = validate_columns({'full_name': names, 'language': [language] * len(names)})
+        assert [result['valid'] for result in results] == [validate_name(name, language) for name in names]
+
+
+def test_batch_reports_errors_per_column():
+    results = validate_columns({
+        'email': ['john@example.com', 'john'],
+        'investment_amount': ['15000', '500'],
+        'tx_hash': ['', 'not a hash']
+    })
+    assert results[0] == {'row': 0, 'valid': True, 'errors': {}}
+    assert results[1]['errors'] == {
+        'email': 'invalid_email', 'investment_amount': 'minimum_amount', 'tx_hash': 'invalid_hash'
+    }
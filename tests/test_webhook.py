@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from webhook import WebhookServer
+
+
+class FakeBot:
+    def __init__(self, error=None):
+        self.error = error
+        self.updates = []
+        self.threads = set()
+
+    def process_new_updates(self, updates):
+        self.threads.add(threading.current_thread().name)
+        if self.error:
+            raise self.error
+        self.updates.extend(updates)
+
+
+def post_all(server, bodies, headers=None):
+    """Post bodies one after another, return response statuses"""
+    async def run():
+        client = TestClient(TestServer(server.app))
+        await client.start_server()
+        try:
+            statuses = []
+            for body in bodies:
+                response = await client.post(server.path, json=body, headers=headers or {})
+                statuses.append(response.status)
+            return statuses
+        finally:
+            await client.close()
+    return asyncio.run(run())
+
+
+def message_update(update_id, chat_id=5):
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id, 'date': 0, 'text': 'hi',
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': 'A'}
+        }
+    }
+
+
+def test_updates_are_passed_to_bot_in_order():
+    bot = FakeBot()
+    statuses = post_all(WebhookServer(bot), [message_update(i) for i in range(1, 6)])
+    assert statuses == [200] * 5
+    assert [update.update_id for update in bot.updates] == [1, 2, 3, 4, 5]
+    assert bot.updates[0].message.chat.id == 5
+
+
+def test_updates_are_handled_off_the_event_loop():
+    bot = FakeBot()
+    post_all(WebhookServer(bot), [message_update(1)])
+    assert all(name.startswith('webhook') for name in bot.threads)
+
+
+def test_secret_token_is_checked():
+    bot = FakeBot()
+    assert post_all(WebhookServer(bot, secret_token='secret'), [message_update(1)]) == [403]
+    headers = {'X-Telegram-Bot-Api-Secret-Token': 'secret'}
+    assert post_all(WebhookServer(bot, secret_token='secret'), [message_update(2)], headers) == [200]
+    assert [update.update_id for update in bot.updates] == [2]
+
+
+def test_invalid_update_is_rejected():
+    bot = FakeBot()
+    assert post_all(WebhookServer(bot), [{'message': 'no update id'}]) == [400]
+    assert bot.updates == []
+
+
+def test_bot_error_asks_telegram_to_retry():
+    bot = FakeBot(error=RuntimeError('database is locked'))
+    assert post_all(WebhookServer(bot), [message_update(1)]) == [500]
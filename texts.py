@@ -0,0 +1,10 @@
+from catalog import Catalog
+
+# MESSAGES[lang][key] -> text, each language is loaded on first use
+MESSAGES = Catalog()
+
+# Supported languages
+LANGUAGES = MESSAGES.codes
+
+# Fail at startup instead of on a KeyError in a handler
+MESSAGES.check()
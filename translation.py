@@ -1,206 +0,0 @@
-TEXTS = {
-    'welcome': {
-        'en': "👋 Welcome! Please select your language:",
-        'ru': "Выберите язык:",
-        'zh': u"欢迎！请选择语言：",
-        'id': "Selamat datang! Silakan pilih bahasa Anda:",
-        'fil': "Maligayang pagdating! Mangyaring piliin ang iyong wika:",
-        'vi': "Chào mừng! Vui lòng chọn ngôn ngữ của bạn:"
-    },
-    'pitch_deck': {
-        'en': "We have prepared a presentation of our project for you. You can review the materials again and, when finished, click the button below to confirm. Thank you for your attention and interest!",
-        'ru': "Мы подготовили для вас презентацию нашего проекта. Можете вновь ознакомиться с материалами и, по завершении, нажать на кнопку ниже для подтверждения. Благодарим за ваше внимание и интерес!",
-        'zh': "我们为您准备了项目演示。您可以再次查看材料，完成后点击下方按钮确认。感谢您的关注和兴趣！",
-        'id': "Kami telah menyiapkan presentasi proyek kami untuk Anda. Anda dapat meninjau materi kembali dan, setelah selesai, klik tombol di bawah untuk konfirmasi. Terima kasih atas perhatian dan minat Anda!",
-        'fil': "Naghanda kami ng presentasyon ng aming proyekto para sa iyo. Maaari mong suriin muli ang mga materyal at, kapag tapos na, i-click ang button sa ibaba para kumpirmahin. Salamat sa iyong atensyon at interes!",
-        'vi': "Chúng tôi đã chuẩn bị bài thuyết trình dự án cho bạn. Bạn có thể xem lại tài liệu và, khi hoàn thành, nhấp vào nút bên dưới để xác nhận. Cảm ơn sự quan tâm và hứng thú của bạn!"
-    },
-    'reviewed_button': {
-        'en': "I have reviewed the pitch deck ✅",
-        'ru': "Я ознакомился с питч деком! ✅",
-        'zh': "我已查看推介材料 ✅",
-        'id': "Saya telah meninjau pitch deck ✅",
-        'fil': "Nasuri ko na ang pitch deck ✅",
-        'vi': "Tôi đã xem xét pitch deck ✅"
-    },
-    'enter_name': {
-        'en': "Great! Please enter your full name.\nFormat:\n • Use English letters (numbers allowed)\n • Provide at least first and last name\n • Each name part should be at least 2 characters\n • You can use comma to separate name parts",
-        'ru': "Отлично! Пожалуйста, введите ваше ФИО.\nФормат:\n • Используйте английские буквы (цифры разрешены)\n • Укажите как минимум имя и фамилию\n • Каждая часть имени должна содержать не менее 2 букв\n • Можно использовать запятую для разделения частей имени",
-        'zh': "太好了！请输入您的全名（可以使用中文）。\n格式：\n • 可以使用中文字符\n • 请输入完整姓名\n • 姓名至少需要2个字",
-        'id': "Bagus! Silakan masukkan nama lengkap Anda.\nFormat:\n • Gunakan huruf bahasa Inggris (angka diperbolehkan)\n • Berikan setidaknya nama depan dan belakang\n • Setiap bagian nama minimal 2 karakter\n • Anda dapat menggunakan koma untuk memisahkan bagian nama",
-        'fil': "Mahusay! Mangyaring ilagay ang iyong buong pangalan.\nFormat:\n • Gumamit ng mga letra ng Ingles (pinapayagan ang mga numero)\n • Magbigay ng hindi bababa sa pangalan at apelyido\n • Bawat bahagi ng pangalan ay dapat hindi bababa sa 2 karakter\n • Maaari kang gumamit ng kuwit para ihiwalay ang mga bahagi ng pangalan",
-        'vi': "Tuyệt! Vui lòng nhập họ tên đầy đủ của bạn.\nĐịnh dạng:\n • Sử dụng chữ cái tiếng Anh (cho phép số)\n • Cung cấp ít nhất họ và tên\n • Mỗi phần tên phải có ít nhất 2 ký tự\n • Bạn có thể sử dụng dấu phẩy để phân tách các phần của tên"
-    },
-    'invalid_name': {
-        'en': "Invalid name format. Please provide at least first and last name (minimum 2 characters each):",
-        'ru': "Неверный формат имени. Пожалуйста, укажите как минимум имя и фамилию (минимум 2 символа в каждой части):",
-        'zh': "无效的姓名格式。请输入至少包含2个字的完整中文姓名：",
-        'id': "Format nama tidak valid. Silakan masukkan minimal nama depan dan belakang (minimal 2 karakter setiap bagian):",
-        'fil': "Hindi valid ang format ng pangalan. Mangyaring magbigay ng hindi bababa sa pangalan at apelyido (minimum 2 karakter bawat isa):",
-        'vi': "Định dạng tên không hợp lệ. Vui lòng cung cấp ít nhất họ và tên (tối thiểu 2 ký tự mỗi phần):"
-    },
-    'enter_amount': {
-        'en': "Please enter the token purchase amount in USD (numbers only). Minimum amount is 10,000.",
-        'ru': "Пожалуйста, введите сумму на покупку токенов в USD (только цифры). Минимальная сумма 10000.",
-        'zh': "请输入代币购买金额（仅限数字，美元）。最低金额为10,000。",
-        'id': "Silakan masukkan jumlah pembelian token dalam USD (angka saja). Jumlah minimal 10.000.",
-        'fil': "Mangyaring ilagay ang halaga ng token purchase sa USD (mga numero lamang). Minimum na halaga ay 10,000.",
-        'vi': "Vui lòng nhập số tiền mua token bằng USD (chỉ số). Số tiền tối thiểu là 10.000."
-    },
-    'invalid_amount': {
-        'en': "Invalid amount. Please enter numbers only (e.g., 1000):",
-        'ru': "Неверная сумма. Пожалуйста, введите только цифры (например, 1000):",
-        'zh': "无效金额。请仅输入数字（例如，1000）：",
-        'id': "Jumlah investasi tidak valid. Silakan masukkan hanya angka (contoh: 1000):",
-        'fil': "Halaga na hindi valid. Mangyaring ilagay mga numero lamang (halimbawa: 1000):",
-        'vi': "Số tiền đầu tư không hợp lệ. Vui lòng nhập chỉ số (ví dụ: 1000):"
-    },
-    'minimum_amount': {
-        'en': "Minimum investment amount is $10,000. Please enter a larger amount:",
-        'ru': "Минимальная сумма инвестиций $10,000. Пожалуйста, введите большую сумму:",
-        'zh': "最小投资金额为 $10,000。请输入更大的金额：",
-        'id': "Jumlah investasi minimum adalah $10,000. Silakan masukkan jumlah yang lebih besar:",
-        'fil': "Minimum na halaga ng pamumuhunan ay $10,000. Mangyaring maglagay ng mas malaking halaga:",
-        'vi': "Số tiền đầu tư tối thiểu là $10,000. Vui lòng nhập số tiền lớn hơn:"
-    },
-    'enter_email': {
-        'en': "Please provide your email address where the SAFT agreement will be sent for signing via DocuSign. Make sure the address is correct to avoid delays.",
-        'ru': "Пожалуйста, укажите ваш email, на который будет отправлен SAFT договор для подписания через DocuSign. Убедитесь, что адрес указан корректно, чтобы избежать задержек.",
-        'zh': "请提供您的电子邮件地址，SAFT协议将通过DocuSign发送至���地址进行签署。请确保地址正确，以避免延误。",
-        'id': "Silakan berikan alamat email Anda di mana perjanjian SAFT akan dikirim untuk ditandatangani melalui DocuSign. Pastikan alamat benar untuk menghindari penundaan.",
-        'fil': "Mangyaring ibigay ang iyong email address kung saan ipapadala ang SAFT agreement para sa pagpirma sa pamamagitan ng DocuSign. Tiyakin na tama ang address upang maiwasan ang mga pagkaantala.",
-        'vi': "Vui lòng cung cấp địa chỉ email của bạn, nơi thỏa thuận SAFT sẽ được gửi để ký thông qua DocuSign. Đảm bảo địa chỉ chính xác để tránh chậm trễ."
-    },
-    'invalid_email': {
-        'en': "Invalid email format. Please enter a valid email address:",
-        'ru': "Неверный формат email. Пожалуйста, введите корректный email:",
-        'zh': "无效的电子邮件格式。请输入有效的电子邮件地址：",
-        'id': "Format email tidak valid. Silakan masukkan alamat email yang valid:",
-        'fil': "Formato ng email na hindi valid. Mangyaring ilagay ang address email na may format yang valid:",
-        'vi': "Định dạng email không hợp lệ. Vui lòng nhập địa chỉ email hợp lệ:"
-    },
-    'document_signed_button': {
-        'en': "Document Signed ✅",
-        'ru': "Документ подписан ✅",
-        'zh': "文件已签署 ✅",
-        'id': "Dokumen Ditandatangani ✅",
-        'fil': "Dokumento Ditandatangani ✅",
-        'vi': "Tài liệu đã ký ✅"
-    },
-    'enter_hash': {
-        'en': "Great! Please provide the transaction hash:",
-        'ru': "Отлично! Пожалуйста, укажите хэш транзакции:",
-        'zh': "很好！请提供交易哈希：",
-        'id': "Bagus! Silakan masukkan hash transaksi:",
-        'fil': "Mahusay! Mangyaring ilagay ang hash transaksi:",
-        'vi': "Tuyệt! Vui lòng nhập hash giao dịch:"
-    },
-    'invalid_hash': {
-        'en': "Invalid transaction hash format. The hash should:\n"
-             "- Start with '0x'\n"
-             "- Contain 66 characters\n"
-             "- Contain only numbers and letters A-F\n\n"
-             "Example:\n"
-             "0x67db4dc0c1ac13bcb0e28fe7652e509fa371c00159bea920719f3a256475ceb9\n\n"
-             "Please enter a valid transaction hash:",
-        'ru': "Неверный формат хэша транзакции. Хэш должен:\n"
-             "- Начинаться с '0x'\n"
-             "- Содержать 66 символов\n"
-             "- Содержать то��ько цифры и буквы A-F\n\n"
-             "Пример:\n"
-             "0x67db4dc0c1ac13bcb0e28fe7652e509fa371c00159bea920719f3a256475ceb9\n\n"
-             "Пожалуйста, введите корректный хэш транзакции:",
-        'zh': "无效的交易哈希格式。哈希应：\n"
-             "- 以 '0x' 开头\n"
-             "- 包含 66 个字符\n"
-             "- 仅包含数字和字母 A-F\n\n"
-             "示例：\n"
-             "0x67db4dc0c1ac13bcb0e28fe7652e509fa371c00159bea920719f3a256475ceb9\n\n"
-             "请输入有效的交易哈希：",
-        'id': "Format hash transaksi tidak valid. Hash harus:\n"
-             "- Mulai dengan '0x'\n"
-             "- Mempunyai 66 karakter\n"
-             "- Hanya terdiri dari angka dan huruf A-F\n\n"
-             "Contoh:\n"
-             "0x67db4dc0c1ac13bcb0e28fe7652e509fa371c00159bea920719f3a256475ceb9\n\n"
-             "Silakan masukkan hash transaksi yang valid:",
-        'fil': "Formato ng hash transaksi na hindi valid. Ang hash ay dapat:\n"
-             "- Magsimula sa '0x'\n"
-             "- Magkaroon ng 66 mga character\n"
-             "- Magkaroon lamang ng mga numero at mga letra A-F\n\n"
-             "Halimbawa:\n"
-             "0x67db4dc0c1ac13bcb0e28fe7652e509fa371c00159bea920719f3a256475ceb9\n\n"
-             "Mangyaring ilagay ang hash transaksi na may format na valid:",
-        'vi': "Định dạng hash giao dịch không hợp lệ. Hash phải:\n"
-             "- Bắt đầu bằng '0x'\n"
-             "- Có 66 ký tự\n"
-             "- Chỉ chứa các chữ số và chữ cái A-F\n\n"
-             "Ví dụ:\n"
-             "0x67db4dc0c1ac13bcb0e28fe7652e509fa371c00159bea920719f3a256475ceb9\n\n"
-             "Vui lòng nhập hash giao dịch hợp lệ:"
-    },
-    'enter_wallet': {
-        'en': "Please provide your EVM wallet address:\n\n"
-             "Format:\n"
-             "- Starts with '0x'\n"
-             "- Contains 42 characters\n"
-             "- Contains only numbers and letters A-F\n\n"
-             "Example:\n"
-             "0x1aD2B053b8c6b1592cB645DEfadf105F34d8C6e1",
-        'ru': "Введите адрес вашего EVM кошелька:\n\n"
-             "Формат:\n"
-             "- Начинается с '0x'\n"
-             "- Содержит 42 символа\n"
-             "- Содержит только цифры и буквы A-F\n\n"
-             "Пример:\n"
-             "0x1aD2B053b8c6b1592cB645DEfadf105F34d8C6e1",
-        'zh': "请提供您��EVM钱包地址：\n\n格式：\n- 以 '0x' 开头\n- 包含 42 个字符\n- 仅包含数字和字母 A-F\n\n示例：\n"
-             "0x1aD2B053b8c6b1592cB645DEfadf105F34d8C6e1",
-        'id': "Silakan masukkan alamat wallet EVM Anda:\n\nFormat:\n- Mulai dengan '0x'\n- Mempunyai 42 karakter\n- Mempunyai hanya angka dan huruf A-F\n\nContoh:\n"
-             "0x1aD2B053b8c6b1592cB645DEfadf105F34d8C6e1",
-        'fil': "Mangyaring ilagay ang address wallet EVM mo:\n\nFormat:\n- Magsimula sa '0x'\n- Mampung 42 mga character\n- Mampung lamang mga numero at mga letra A-F\n\nHalimbawa:\n"
-             "0x1aD2B053b8c6b1592cB645DEfadf105F34d8C6e1",
-        'vi': "Vui lòng cung cấp địa chỉ ví EVM của bạn:\n\nĐịnh dạng:\n- Bắt đầu bằng '0x'\n- Mempunyai 42 ký tự\n- Mempunyai hanya chữ số và chữ cái A-F\n\nVí dụ:\n"
-             "0x1aD2B053b8c6b1592cB645DEfadf105F34d8C6e1"
-    },
-    'invalid_wallet': {
-        'en': "Invalid wallet address format. Please enter a valid EVM wallet address:",
-        'ru': "Неверный формат адреса кошелька. Пожалуйста, введите корректный адрес EVM кошелька:",
-        'zh': "无效的钱包地址格式。请输入有效的EVM钱包地址：",
-        'id': "Format alamat wallet EVM tidak valid. Silakan masukkan alamat wallet EVM yang valid:",
-        'fil': "Formato ng address wallet EVM na hindi valid. Mangyaring ilagay ang address wallet EVM na may format na valid:",
-        'vi': "Định dạng địa chỉ ví không hợp lệ. Vui lòng nhập địa chỉ ví EVM hợp lệ:"
-    },
-    'success': {
-        'en': "Thank you! Your information has been recorded. You will receive your tokens soon.",
-        'ru': "Спасибо! Ваша информация записана. Вы получите токены в ближайшее время.",
-        'zh': "谢谢！您的信息已记录。您很快会收到代币。",
-        'id': "Terima kasih! Informasi Anda telah dicatat. Anda akan segera menerima token.",
-        'fil': "Salamat! Ang iyong impormasyon ay naitala na. Matatanggap mo ang iyong mga token sa lalong madaling panahon.",
-        'vi': "Cảm ơn bạn! Thông tin của bạn đã được ghi lại. Bạn sẽ sớm nhận được token."
-    },
-    'record_error': {
-        'en': "There was an error recording your information. Please contact support.",
-        'ru': "Произошла ошибка при записи информации. Пожалуйста, свяжитесь с поддержкой.",
-        'zh': "记录信息时出错。请与支���团队联系。",
-        'id': "Terjadi kesalahan sa mencatat informasi Anda. Silakan hubungi tim dukungan.",
-        'fil': "May nalaman na ang error sa mencatat ang impormasyon mo. Mangyaring makipag-ugnay sa mga tagapakinig.",
-        'vi': "Đã xảy ra lỗi khi ghi lại thông tin của bạn. Vui lòng liên hệ với nhóm hỗ trợ."
-    },
-    'wait_for_confirmation': {
-        'en': "Thank you! Please wait for confirmation.",
-        'ru': "Спасибо! Пожалуйста, ожидайте подтверждения.",
-        'zh': "谢谢！请等待确认。",
-        'id': "Terima kasih! Silakan tunggu konfirmasi.",
-        'fil': "Salamat! Mangyaring maghintay ng kumpirmasyon.",
-        'vi': "Cảm ơn bạn! Vui lòng đợi xác nhận."
-    },
-    'documents_sent': {
-        'en': "Documents have been sent to your email. Please review and sign them.",
-        'ru': "Документы были отправлены на ваш email. Пожалуйста, ознакомьтесь и подпишите их.",
-        'zh': "文件已发送到您的电子邮件。请查看并签署。",
-        'id': "Dokumen telah dikirim ke email Anda. Silakan tinjau dan tandatangani.",
-        'fil': "Ang mga dokumento ay naipadala sa iyong email. Mangyaring suriin at pirmahan ang mga ito.",
-        'vi': "Tài liệu đã được gửi đến email của bạn. Vui lòng xem xét và ký tên."
-    }
-} 
\ No newline at end of file
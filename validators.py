@@ -0,0 +1,91 @@
+import re
+
+# Minimum investment amount in USD
+MIN_AMOUNT = 10000
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+HASH_PATTERN = re.compile(r'^0x[0-9a-fA-F]{64}$')
+WALLET_PATTERN = re.compile(r'^0x[0-9a-fA-F]{40}$')
+
+# At least two parts of 2+ letters, digits, '-' or "'" separated by spaces or commas
+NAME_PATTERN = re.compile(r"[\s,]*(?:[a-zA-Z0-9'-]{2,}[\s,]+)+[a-zA-Z0-9'-]{2,}[\s,]*")
+
+def validate_email(email):
+    """Validate email format"""
+    return EMAIL_PATTERN.match(email) is not None
+
+def validate_name(name, lang='en'):
+    """Validate name format based on language"""
+    if lang == 'zh':
+        # For Chinese names, just check if it's not empty and has at least 2 characters
+        return len(name.strip()) >= 2
+    return NAME_PATTERN.fullmatch(name) is not None
+
+def validate_hash(tx_hash):
+    """Validate transaction hash format"""
+    return HASH_PATTERN.match(tx_hash) is not None
+
+def validate_wallet(wallet):
+    """Validate wallet address format"""
+    return WALLET_PATTERN.match(wallet) is not None
+
+def check_amount(value):
+    """Return error code for investment amount or None if valid"""
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return 'invalid_amount'
+    if amount < MIN_AMOUNT:
+        return 'minimum_amount'
+    return None
+
+def _check(predicate, error_code):
+    def check(value, language):
+        return None if predicate(value) else error_code
+    return check
+
+def _optional(check):
+    """Allow empty values, e.g. hash and wallet of pending applications"""
+    def check_optional(value, language):
+        return check(value, language) if value else None
+    return check_optional
+
+def _check_name(value, language):
+    return None if validate_name(value, language) else 'invalid_name'
+
+# Column name -> function(value, language) returning error code or None
+COLUMN_CHECKS = {
+    'full_name': _check_name,
+    'investment_amount': lambda value, language: check_amount(value),
+    'email': _check(validate_email, 'invalid_email'),
+    'tx_hash': _optional(_check(validate_hash, 'invalid_hash')),
+    'wallet_address': _optional(_check(validate_wallet, 'invalid_wallet'))
+}
+
+def validate_columns(columns):
+    """Validate columns of values in one pass
+
+    columns maps column names from COLUMN_CHECKS to equally long lists of
+    values. An optional 'language' column holds each record's language,
+    names are checked by the rules of that language as in validate_name.
+    Returns a list with one dict per record:
+    {'row': index, 'valid': bool, 'errors': {column: error_code}}.
+    """
+    columns = dict(columns)
+    languages = columns.pop('language', None)
+    unknown = set(columns) - set(COLUMN_CHECKS)
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+
+    names = list(columns)
+    checks = [COLUMN_CHECKS[name] for name in names]
+    results = []
+    for row, values in enumerate(zip(*(columns[name] for name in names))):
+        language = (languages[row] if languages else None) or 'en'
+        errors = {}
+        for name, check, value in zip(names, checks, values):
+            error = check(value if value is not None else '', language)
+            if error:
+                errors[name] = error
+        results.append({'row': row, 'valid': not errors, 'errors': errors})
+    return results
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from telebot import types
+
+logger = logging.getLogger(__name__)
+
+class WebhookServer:
+    """Receive updates over webhook and hand them to the bot
+
+    Updates are handed to the bot on a single thread, so the event loop
+    never waits on the database and updates keep their arrival order. The
+    bot queues them on its per-chat worker pool.
+    """
+
+    def __init__(self, bot, path='/webhook', secret_token=None):
+        self.bot = bot
+        self.path = path
+        self.secret_token = secret_token
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='webhook')
+
+        self.app = web.Application()
+        self.app.router.add_post(self.path, self.handle_update)
+
+    async def handle_update(self, request):
+        """Accept update and queue it for processing"""
+        if self.secret_token and request.headers.get('X-Telegram-Bot-Api-Secret-Token') != self.secret_token:
+            return web.Response(status=403)
+
+        try:
+            update = types.Update.de_json(await request.json())
+        except Exception as e:
+            logger.error(f"Invalid update received: {e}")
+            return web.Response(status=400)
+
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self.bot.process_new_updates, [update])
+        except Exception as e:
+            logger.error(f"Error queueing update {update.update_id}: {e}")
+            # Telegram retries the update
+            return web.Response(status=500)
+
+        # Reply right away, Telegram does not wait for handlers
+        return web.Response()
+
+    def run(self, host='0.0.0.0', port=8443):
+        """Serve webhook until interrupted"""
+        logger.info(f"Webhook server listening on {host}:{port}{self.path}")
+        try:
+            web.run_app(self.app, host=host, port=port, print=None)
+        finally:
+            self._executor.shutdown(wait=True)
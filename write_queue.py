@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindQueue:
+    """Persist user data to the sheet from a background worker"""
+
+    def __init__(self, excel_service, journal_path='write_journal.jsonl', base_delay=1, max_delay=60,
+                 batch_window=2, max_batch_size=100):
+        self.excel_service = excel_service
+        self.journal_path = journal_path
+        # Writes are gathered for batch_window seconds or until max_batch_size records
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._cond = threading.Condition()
+        # investment_id -> {'seqs': [...], 'record': {...}}
+        self._pending = {}
+        self._in_flight = 0
+        self._seq = 0
+        self._stopping = False
+
+        # Replay records left over from a previous run
+        self._replay_journal()
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+
+        self._worker = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._worker.start()
+        logger.info(f"Write-behind queue started with {len(self._pending)} pending records")
+
+    def _replay_journal(self):
+        """Load unacknowledged records from journal and compact it"""
+        records = {}
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn write at the end of the file
+                        logger.warning("Skipping corrupted journal line")
+                        continue
+                    if 'ack' in entry:
+                        records.pop(entry['ack'], None)
+                    else:
+                        records[entry['seq']] = entry['record']
+        except FileNotFoundError:
+            pass
+
+        for seq in sorted(records):
+            self._merge(seq, records[seq])
+            self._seq = max(self._seq, seq)
+
+        # Rewrite journal with pending records only
+        tmp_path = self.journal_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for seq in sorted(records):
+                f.write(json.dumps({'seq': seq, 'record': records[seq]}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+        if records:
+            logger.info(f"Replayed {len(records)} records from journal")
+
+    def _merge(self, seq, record):
+        """Coalesce record with pending writes for the same investment ID"""
+        entry = self._pending.get(record['investment_id'])
+        if entry is None:
+            self._pending[record['investment_id']] = {'seqs': [seq], 'record': dict(record)}
+            return
+        entry['seqs'].append(seq)
+        for key, value in record.items():
+            # Later non-empty values win
+            if value not in (None, ''):
+                entry['record'][key] = value
+
+    def _write_journal(self, entries):
+        """Append entries to journal and fsync"""
+        for entry in entries:
+            self._journal.write(json.dumps(entry) + '\n')
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def enqueue(self, investment_id, telegram_id, full_name, investment_amount, email, tx_hash="", wallet_address=""):
+        """Journal record and schedule it for saving"""
+        record = {
+            'investment_id': investment_id,
+            'telegram_id': telegram_id,
+            'full_name': full_name,
+            'investment_amount': investment_amount,
+            'email': email,
+            'tx_hash': tx_hash,
+            'wallet_address': wallet_address
+        }
+        with self._cond:
+            try:
+                self._seq += 1
+                self._write_journal([{'seq': self._seq, 'record': record}])
+            except Exception as e:
+                logger.error(f"Error writing to journal: {e}")
+                return False
+            self._merge(self._seq, record)
+            self._cond.notify()
+        logger.info(f"Queued write for investment ID: {investment_id}")
+        return True
+
+    def _run(self):
+        """Drain queue, retrying failed writes with backoff"""
+        attempt = 0
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                # Give more writes a chance to join the batch
+                deadline = time.monotonic() + self.batch_window
+                while len(self._pending) < self.max_batch_size and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = {}
+                for investment_id in list(self._pending)[:self.max_batch_size]:
+                    batch[investment_id] = self._pending.pop(investment_id)
+                self._in_flight = len(batch)
+
+            try:
+                results = self.excel_service.save_batch([entry['record'] for entry in batch.values()])
+            except Exception as e:
+                logger.error(f"Error saving batch: {e}")
+                results = {}
+            failed = {}
+            acked = []
+            for investment_id, entry in batch.items():
+                if results.get(investment_id):
+                    acked.extend(entry['seqs'])
+                else:
+                    failed[investment_id] = entry
+
+            with self._cond:
+                try:
+                    self._write_journal([{'ack': seq} for seq in acked])
+                except Exception as e:
+                    # Unacked records are replayed and coalesced on restart
+                    logger.error(f"Error writing acks to journal: {e}")
+
+                # Merge newer writes on top of failed records
+                for investment_id, entry in failed.items():
+                    newer = self._pending.pop(investment_id, None)
+                    self._pending[investment_id] = entry
+                    if newer:
+                        seqs = newer['seqs']
+                        self._merge(seqs[0], newer['record'])
+                        entry['seqs'].extend(seqs[1:])
+                self._in_flight = 0
+
+                if not self._pending:
+                    self._compact()
+                self._cond.notify_all()
+
+                if failed:
+                    delay = min(self.base_delay * 2 ** attempt, self.max_delay)
+                    attempt += 1
+                    logger.warning(f"Failed to save {len(failed)} records, retrying in {delay}s")
+                    if self._stopping:
+                        return
+                    self._cond.wait(delay)
+                else:
+                    attempt = 0
+
+    def _compact(self):
+        """Truncate journal once everything is saved"""
+        try:
+            self._journal.close()
+            self._journal = open(self.journal_path, 'w', encoding='utf-8')
+        except Exception as e:
+            logger.error(f"Error compacting journal: {e}")
+
+    def pending_count(self):
+        """Number of records waiting to be saved"""
+        with self._cond:
+            return len(self._pending) + self._in_flight
+
+    def stop(self, timeout=30):
+        """Stop worker after flushing pending records"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._worker.join(timeout)
+        with self._cond:
+            self._journal.close()
+        logger.info("Write-behind queue stopped")